@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Stand-in for the frps/frpc binaries used by the benchmarks
+
+Installed as both `frps` and `frpc`. `-c FILE` runs until killed, listening
+on bindPort (frps) so readiness checks pass; `reload` exits immediately.
+The process renames itself after the binary so `pkill frps` in `ft stop`
+finds it like the real one instead of a `python` process.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import socket
+import sys
+import time
+
+PR_SET_NAME = 15
+
+
+def set_process_name(name):
+    """Set the kernel process name (comm) that pgrep/pkill match; Linux only"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.prctl(PR_SET_NAME, name.encode()[:15], 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
+
+
+def main():
+    set_process_name(os.path.basename(sys.argv[0]))
+    args = sys.argv[1:]
+    if args[:1] in (['reload'], ['verify'], ['-v'], ['--version']):
+        return 0
+    config = args[args.index('-c') + 1] if '-c' in args else None
+    port = None
+    if config and sys.argv[0].endswith('frps'):
+        import yaml
+        with open(config) as f:
+            port = (yaml.safe_load(f) or {}).get('bindPort')
+    if port:
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('127.0.0.1', port))
+        sock.listen(64)
+        while True:
+            sock.accept()[0].close()
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Performance regression benchmarks for the ft CLI hot paths
+
+Runs every scenario against stand-in frps/frpc binaries and a local stub
+of the dashboard/admin APIs in a throwaway HOME, then compares the median
+latency with benchmarks/thresholds.json. Limits there are multiples of
+the reference scenario (interpreter start plus dependency imports) timed
+in the same run, so a slower CI machine moves both sides alike. Exits 1
+on any regression.
+
+The start/reload/stop scenarios run `ft server/client stop`, which kill
+every frps/frpc on the host, so the run refuses to start (exit 2) while
+any other frps/frpc process is alive.
+
+    python benchmarks/run.py                 # run all, check thresholds
+    python benchmarks/run.py -k status       # scenarios matching 'status'
+    python benchmarks/run.py --update        # rewrite thresholds (ratio x 2)
+    FT_BENCH_LOG_GB=8 python benchmarks/run.py -k log
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(HERE))
+
+from stub_api import StubAPI  # noqa: E402
+
+THRESHOLDS = HERE / 'thresholds.json'
+PR_SET_CHILD_SUBREAPER = 36
+FT = [sys.executable, '-c', 'from frp_tunnel import main; main()']
+
+
+def adopt_orphans():
+    """Become the child subreaper (Linux) and reap fakes killed by `ft stop`
+
+    ft starts frps/frpc detached, so they outlive the ft process; without an
+    init that reaps them (e.g. in containers) their zombies keep `pgrep`
+    in is_running() true, so `ft stop` reports failure and the next start
+    is skipped. Reaping happens on SIGCHLD, while ft is still waiting.
+    """
+    try:
+        import ctypes
+        import ctypes.util
+        ctypes.CDLL(ctypes.util.find_library('c')).prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0)
+    except (OSError, AttributeError):
+        return
+    signal.signal(signal.SIGCHLD, reap_fakes)
+
+
+def reap_fakes(signum=None, frame=None):
+    """Reap zombie fakes only; subprocess keeps the exit status of ft itself"""
+    import psutil
+    for child in psutil.Process().children():
+        try:
+            if child.status() == psutil.STATUS_ZOMBIE and child.name() in ('frps', 'frpc'):
+                os.waitpid(child.pid, os.WNOHANG)
+        except (psutil.Error, ChildProcessError):
+            pass
+
+
+def foreign_frp():
+    """frps/frpc processes that `ft stop`'s host-wide pkill would hit, other than our fakes"""
+    import psutil
+    found = []
+    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+        name = proc.info['name'] or ''
+        cmdline = proc.info['cmdline'] or []
+        # pkill matches a substring of the process name
+        if ('frps' in name or 'frpc' in name) and not any('ft-bench-' in arg for arg in cmdline):
+            found.append(f"{proc.info['pid']} {' '.join(cmdline) or name}")
+    return found
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Env:
+    """Isolated HOME with fake binaries, configs and a stub API"""
+
+    def __init__(self, proxies=200):
+        self.home = Path(tempfile.mkdtemp(prefix='ft-bench-'))
+        self.data = self.home / 'data' / 'frp'
+        self.data.mkdir(parents=True)
+        self.bin = self.home / 'bin'
+        self.bin.mkdir()
+        fake = (HERE / 'fake_frp.py').read_text().split('\n', 1)[1]
+        for name in ('frps', 'frpc'):
+            path = self.bin / name
+            path.write_text(f'#!{sys.executable}\n{fake}')
+            path.chmod(0o755)
+        self.api = StubAPI(proxies)
+        self.env = dict(os.environ, HOME=str(self.home), FT_BIN_DIR=str(self.bin),
+                        FT_PUBLIC_IP='203.0.113.1', PYTHONPATH=str(ROOT))
+        self.env.pop('FT_TRACE', None)
+        self.env.pop('FT_PROFILE', None)
+        self.procs = []
+        self.write_configs(proxies)
+
+    def write_configs(self, proxies):
+        frps = {
+            'bindPort': free_port(),
+            'auth': {'token': 'frp_bench'},
+            'webServer': {'addr': '127.0.0.1', 'port': self.api.port, 'user': 'admin', 'password': 'admin'},
+            'log': {'to': str(self.data / 'frps.log'), 'level': 'info'},
+        }
+        frpc = {
+            'serverAddr': '127.0.0.1',
+            'serverPort': frps['bindPort'],
+            'auth': {'token': 'frp_bench'},
+            'log': {'to': str(self.data / 'frpc.log'), 'level': 'info'},
+            'webServer': {'addr': '127.0.0.1', 'port': self.api.port},
+            'proxies': [{'name': f'ssh_{10000 + i}', 'type': 'tcp', 'localIP': '127.0.0.1',
+                         'localPort': 22, 'remotePort': 10000 + i} for i in range(proxies)],
+        }
+        for name, cfg in (('frps.yaml', frps), ('frpc.yaml', frpc)):
+            with open(self.data / name, 'w') as f:
+                yaml.dump(cfg, f, default_flow_style=False)
+
+    def ft(self, *args):
+        result = subprocess.run(FT + list(args), env=self.env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ft {' '.join(args)} failed: {(result.stderr or result.stdout).strip()[-500:]}")
+        return result.stdout
+
+    def python(self, code):
+        result = subprocess.run([sys.executable, '-c', code], env=self.env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f'benchmark snippet failed: {result.stderr.strip()[-500:]}')
+
+    def spawn(self, *args):
+        self.procs.append(subprocess.Popen(FT + list(args), env=self.env, stdout=subprocess.DEVNULL,
+                                           stderr=subprocess.DEVNULL))
+
+    def close(self):
+        for proc in self.procs:
+            proc.terminate()
+            proc.wait()
+        subprocess.run(['pkill', '-f', str(self.bin)], capture_output=True)
+        self.api.close()
+        shutil.rmtree(self.home, ignore_errors=True)
+
+
+# ─── Scenarios ───
+# Each returns a callable timed per repetition (setup happens once).
+
+def bench_reference(env):
+    """What every ft command pays before our code runs"""
+    return lambda: env.python('import click, rich.console, yaml, requests')
+
+
+def bench_server_status(env):
+    env.ft('server', 'start')
+    return lambda: env.ft('server', 'status')
+
+
+def bench_client_status(env):
+    env.ft('client', 'start')
+    return lambda: env.ft('client', 'status')
+
+
+def bench_status_fast(env):
+    env.ft('server', 'start')
+    env.ft('client', 'start')
+    env.spawn('daemon')
+    sock = env.data / 'ft.sock'
+    for _ in range(100):
+        if sock.exists():
+            break
+        time.sleep(0.05)
+    return lambda: env.ft('status', '--fast')
+
+
+def bench_client_cycle(env):
+    def cycle():
+        env.ft('client', 'start')
+        env.ft('client', 'reload')
+        env.ft('client', 'stop')
+    return cycle
+
+
+def bench_server_cycle(env):
+    def cycle():
+        env.ft('server', 'start')
+        env.ft('server', 'reload')
+        env.ft('server', 'stop')
+    return cycle
+
+
+def bench_ssh_config_large(env):
+    out = env.home / 'ssh_config'
+    return lambda: env.ft('ssh-config', '--source', 'client', '--output', str(out))
+
+
+def bench_fleet_render_5k(env):
+    inventory = env.home / 'inventory.yaml'
+    with open(inventory, 'w') as f:
+        yaml.dump({'server': {'addr': 'relay', 'secret': 'bench'},
+                   'hosts': [{'name': f'host-{i}'} for i in range(5000)]}, f)
+    out = env.home / 'fleet'
+
+    def render():
+        shutil.rmtree(out, ignore_errors=True)
+        env.ft('fleet', 'render', str(inventory), '--out', str(out))
+    return render
+
+
+def bench_log_tail(env):
+    """Tail a multi-GB log; sparse, so it costs no disk but a full read is still slow"""
+    size = int(float(os.getenv('FT_BENCH_LOG_GB', '2')) * (1 << 30))
+    tail = ''.join(f'2026/01/01 00:00:{i % 60:02d} [I] [proxy/proxy.go:204] [ssh_6022] '
+                   f'get a user connection [1.2.3.4:{40000 + i}]\n' for i in range(5000))
+    for name in ('frps.log', 'frpc.log'):
+        with open(env.data / name, 'wb') as f:
+            f.truncate(size)
+            f.seek(size)
+            f.write(tail.encode())
+    return lambda: env.python('from frp_tunnel.core import TunnelManager; '
+                              'assert len(TunnelManager().get_logs(200)) == 400')
+
+
+REFERENCE = 'reference_imports'
+
+SCENARIOS = {
+    REFERENCE: (bench_reference, 10),
+    'server_status': (bench_server_status, 5),
+    'client_status': (bench_client_status, 5),
+    'status_fast_daemon': (bench_status_fast, 10),
+    'client_start_reload_stop': (bench_client_cycle, 3),
+    'server_start_reload_stop': (bench_server_cycle, 2),
+    'ssh_config_2000_proxies': (bench_ssh_config_large, 3),
+    'fleet_render_5000_hosts': (bench_fleet_render_5k, 3),
+    'log_tail_multi_gb': (bench_log_tail, 5),
+}
+
+
+def run(name, repeat):
+    factory, default_repeat = SCENARIOS[name]
+    env = Env(proxies=2000 if 'ssh_config' in name else 200)
+    try:
+        func = factory(env)
+        func()  # warm-up: page cache, .pyc files
+        times = []
+        for _ in range(repeat or default_repeat):
+            start = time.perf_counter()
+            func()
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times), max(times)
+    finally:
+        env.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-k', default='', help='Only run scenarios containing this text')
+    parser.add_argument('--repeat', type=int, default=0, help='Repetitions per scenario')
+    parser.add_argument('--update', action='store_true', help='Rewrite thresholds from this run')
+    parser.add_argument('--factor', type=float, default=2.0, help='Headroom for --update')
+    args = parser.parse_args()
+
+    # The cycle scenarios run `ft server/client stop`, which kill every frps/frpc on the host
+    others = foreign_frp()
+    if others:
+        print('Refusing to run: ft stop in the benchmarks would kill these frp processes:')
+        print('\n'.join(f'  {p}' for p in others))
+        print('Stop them first, or run the benchmarks on a machine without a live frps/frpc.')
+        return 2
+    adopt_orphans()
+    thresholds = json.loads(THRESHOLDS.read_text()) if THRESHOLDS.exists() else {}
+    ratios = thresholds.setdefault('limits', {})
+    failed = []
+    print(f"{'scenario':<28} {'median':>10} {'max':>10} {'ratio':>7} {'limit':>10}")
+    # The reference always runs first: every limit is relative to it
+    ref, worst = run(REFERENCE, args.repeat)
+    print(f'{REFERENCE:<28} {ref:>8.0f}ms {worst:>8.0f}ms {1:>7.1f} {"-":>10}')
+    for name in SCENARIOS:
+        if name == REFERENCE or args.k not in name:
+            continue
+        median, worst = run(name, args.repeat)
+        ratio = median / ref
+        limit = ratios.get(name)
+        verdict = ''
+        if args.update:
+            ratios[name] = round(ratio * args.factor, 1)
+        elif limit is not None and ratio > limit:
+            failed.append(name)
+            verdict = '  REGRESSION'
+        limit_text = f'{limit * ref:.0f}ms' if limit is not None else '-'
+        print(f'{name:<28} {median:>8.0f}ms {worst:>8.0f}ms {ratio:>7.1f} {limit_text:>10}{verdict}')
+
+    if args.update:
+        thresholds['reference'] = REFERENCE
+        THRESHOLDS.write_text(json.dumps(thresholds, indent=2, sort_keys=True) + '\n')
+        print(f'Updated {THRESHOLDS}')
+    if failed:
+        print(f"\n{len(failed)} regression(s): {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
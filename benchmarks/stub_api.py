@@ -0,0 +1,55 @@
+"""Local stub of the frps dashboard and frpc admin HTTP APIs"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_proxies(count):
+    """Dashboard-style tcp proxy list"""
+    return [{
+        'name': f'ssh_{10000 + i}',
+        'conf': {'remotePort': 10000 + i},
+        'clientVersion': '0.52.3',
+        'curConns': i % 7,
+        'todayTrafficIn': i * 1024,
+        'todayTrafficOut': i * 2048,
+        'status': 'online',
+    } for i in range(count)]
+
+
+class StubAPI:
+    """Serve /api/serverinfo, /api/proxy/<type> and /api/status on a free port"""
+
+    def __init__(self, proxies=100):
+        tcp = make_proxies(proxies)
+        status = {'tcp': [{'name': p['name'], 'type': 'tcp', 'status': 'running', 'err': '',
+                           'remote_addr': f":{p['conf']['remotePort']}"} for p in tcp]}
+        routes = {
+            '/api/serverinfo': {'version': '0.52.3', 'clientCounts': proxies, 'curConns': 0},
+            '/api/proxy/tcp': {'proxies': tcp},
+            '/api/status': status,
+        }
+        bodies = {path: json.dumps(body).encode() for path, body in routes.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = bodies.get(self.path, b'{"proxies": []}')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
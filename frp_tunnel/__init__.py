@@ -2,6 +2,7 @@
 
 __version__ = "1.1.6"
 
-from .cli import main
+from . import trace  # first, so CLI import time is measured
+from .fast import main  # full CLI is imported lazily
 
 __all__ = ['main']
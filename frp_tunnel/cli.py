@@ -9,7 +9,7 @@ import platform
 from pathlib import Path
 import click
 from rich.console import Console
-from . import __version__
+from . import __version__, trace
 
 console = Console()
 
@@ -24,6 +24,7 @@ HOME = Path.home()
 DATA_DIR = HOME / 'data' / 'frp'
 SERVER_YAML = DATA_DIR / 'frps.yaml'
 CLIENT_YAML = DATA_DIR / 'frpc.yaml'
+CLUSTER_YAML = DATA_DIR / 'cluster.yaml'
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 # Binary paths - bundled in project, auto-download if missing
@@ -38,6 +39,8 @@ def _platform_info():
 
 def _get_bin_dir():
     """Get binary directory for current platform"""
+    if os.getenv('FT_BIN_DIR'):
+        return Path(os.environ['FT_BIN_DIR'])
     os_name, arch = _platform_info()
     # Try project bundled dir first
     pkg_dir = Path(__file__).parent.parent / 'bin' / f'{os_name}_{arch}'
@@ -62,6 +65,7 @@ def _check_bin(binary):
         console.print("💡 Run 'ft server init' or 'ft client init' to auto-download")
         sys.exit(1)
 
+@trace.timed('ensure_binaries')
 def _ensure_binaries():
     """Download FRP binaries if not present in bin dir"""
     frps, frpc = _frps_bin(), _frpc_bin()
@@ -100,13 +104,17 @@ def _ensure_binaries():
 def gen_token():
     return f"frp_{secrets.token_hex(16)}"
 
+@trace.timed('public_ip')
 def get_public_ip():
+    if os.getenv('FT_PUBLIC_IP'):
+        return os.environ['FT_PUBLIC_IP']
     try:
         import requests
         return requests.get('https://api.myip.com', timeout=3).json().get('ip', 'unknown')
     except:
         return 'unknown'
 
+@trace.timed('process_check')
 def is_running(name):
     try:
         if sys.platform == 'win32':
@@ -118,12 +126,14 @@ def is_running(name):
     except:
         return False
 
+@trace.timed('stop_process')
 def _stop(name):
     if sys.platform == 'win32':
         subprocess.run(['taskkill', '/F', '/IM', f'{name}.exe'], capture_output=True)
     else:
         subprocess.run(['pkill', '-9', name], capture_output=True)
 
+@trace.timed('spawn')
 def _start_bg(binary, config):
     _check_bin(binary)
     if sys.platform == 'win32':
@@ -137,7 +147,11 @@ CTX = {'help_option_names': ['-h', '--help']}
 
 @click.group(context_settings=CTX)
 @click.version_option(__version__)
-def cli():
+@click.option('--trace', 'trace_on', is_flag=True, help='Print phase timings as JSON lines (or FT_TRACE=1)')
+@click.option('--trace-file', type=click.Path(dir_okay=False), default=None, help='Write phase timings to FILE (.json: Chrome trace)')
+@click.option('--profile', type=click.Choice(['cprofile', 'pyinstrument']), default=None, help='Profile the command (or FT_PROFILE=...)')
+@click.pass_context
+def cli(ctx, trace_on, trace_file, profile):
     """🚀 FRP Tunnel - Easy SSH tunneling with FRP
 
     \b
@@ -145,18 +159,46 @@ def cli():
     ft server start/stop    Control server
     ft server status        Show server status
     ft server install       Install as system service
+    ft server doctor        Check kernel settings
+    ft server stats         Show frps resource usage
     ft server reload        Restart server (apply config)
     \b
     ft client init          Generate client config
     ft client start/stop    Control client
     ft client status        Show client status
     ft client reload        Hot-reload client config
+    ft client watch         Stream proxy state changes
+    ft client visit NAME    Connect to a P2P proxy
+    ft client stats         Show frpc resource usage
+    ft client limit NAME 10MB   Set a proxy bandwidth limit
+    ft client shape         Adjust limits by policy class
+    ft client expose-http NAME --local PORT   Share a web UI via HTTP vhost
+    ft client health NAME   Set a proxy health check
+    ft client failover NAME Switch to standby targets on failure
+    \b
+    ft cluster status       Aggregate sharded cluster
+    ft fleet render         Render configs from inventory
+    ft fleet auth           Verify per-host keys (frps plugin)
+    ft fleet status/reload/stop   Control many servers
     \b
     ft frps <args>          Run frps directly
     ft frpc <args>          Run frpc directly
+    ft ssh-config           Generate ~/.ssh/config entries
     ft token                Generate auth token
+    ft status [--fast]      Show server + client status
+    ft daemon               Serve cached status on a socket
+    \b
+    ft --trace <cmd>        Print phase timings
+    ft --profile cprofile <cmd>   Profile a command
     """
-    pass
+    if trace_on or trace_file:
+        trace.enable(trace_file)
+    trace.mark_imported()
+    if trace.enabled():
+        ctx.with_resource(trace.span('command', command=trace.command_name()))
+    profile = profile or os.getenv('FT_PROFILE')
+    if profile:
+        ctx.with_resource(trace.profiled(profile, DATA_DIR))
 
 # ─── SERVER ───
 
@@ -167,7 +209,14 @@ def server():
 
 @server.command('init')
 @click.option('--force', '-f', is_flag=True, help='Overwrite existing config')
-def server_init(force):
+@click.option('--shards', default=1, type=click.IntRange(1), help='frps instances per host (ports 7000+i)')
+@click.option('--nodes', default=None, help='Comma-separated cluster hosts, e.g. relay1,relay2')
+@click.option('--mux', is_flag=True, help='Enable tcpmux: route SSH by hostname on one port')
+@click.option('--mux-port', default=5002, type=int, help='tcpmux HTTP CONNECT port (with --mux)')
+@click.option('--vhost-http-port', default=None, type=int, help='Serve http proxies by Host header on this port')
+@click.option('--subdomain-host', default=None, help='Domain for http proxy subdomains, e.g. tunnel.example.com')
+@click.option('--node-log-dir', default=None, help='Log directory on --nodes hosts (default: log to console/journal)')
+def server_init(force, shards, nodes, mux, mux_port, vhost_http_port, subdomain_host, node_log_dir):
     """Generate server config (frps.yaml)"""
     _ensure_binaries()
     if SERVER_YAML.exists() and not force:
@@ -175,16 +224,70 @@ def server_init(force):
         return
     import yaml
     token = gen_token()
+    extra_ports = {}
+    if mux:
+        extra_ports['tcpmuxHTTPConnectPort'] = mux_port
+    if subdomain_host and not vhost_http_port:
+        from .core.vhost import DEFAULT_VHOST_HTTP_PORT
+        vhost_http_port = DEFAULT_VHOST_HTTP_PORT
+    if vhost_http_port:
+        extra_ports['vhostHTTPPort'] = vhost_http_port
+    if subdomain_host:
+        extra_ports['subdomainHost'] = subdomain_host
+    if shards > 1 or nodes:
+        _init_cluster(token, shards, [n.strip() for n in nodes.split(',') if n.strip()] if nodes else None, extra_ports,
+                      node_log_dir)
+        return
+    from .core.cluster import remove_cluster
+    for path in remove_cluster(CLUSTER_YAML, keep=SERVER_YAML):
+        console.print(f"🗑️  Removed old shard config: {path}")
     config = {
         'bindPort': 7000,
         'auth': {'token': token},
         'webServer': {'addr': '0.0.0.0', 'port': 7500, 'user': 'admin', 'password': 'admin'},
         'log': {'to': str(DATA_DIR / 'frps.log'), 'level': 'info'}
     }
-    with open(SERVER_YAML, 'w') as f:
-        yaml.dump(config, f, default_flow_style=False)
+    config.update(extra_ports)
+    with trace.span('write_config'):
+        with open(SERVER_YAML, 'w') as f:
+            yaml.dump(config, f, default_flow_style=False)
     console.print(f"✅ Config created: {SERVER_YAML}")
     console.print(f"🔑 Token: [bold yellow]{token}[/bold yellow]")
+    if mux:
+        console.print(f"🔀 tcpmux on port {mux_port}: clients use [yellow]ft client init --mux[/yellow]")
+    if vhost_http_port:
+        where = f" for *.{subdomain_host}" if subdomain_host else ''
+        console.print(f"🌍 HTTP vhost on port {vhost_http_port}{where}: clients use [yellow]ft client expose-http NAME --local PORT[/yellow]")
+
+def _init_cluster(token, shards, nodes, extra_ports=None, node_log_dir=None):
+    """Write shard configs sharing one token, plus the cluster manifest"""
+    from .core.cluster import plan_cluster, write_cluster, remove_cluster, server_list
+    plan = plan_cluster(nodes, shards, DATA_DIR, node_log_dir=node_log_dir)
+    # Drop shards of a previous, larger or differently laid out cluster
+    current = {Path(n['config']) for n in plan}
+    for path in remove_cluster(CLUSTER_YAML, keep=SERVER_YAML):
+        if path not in current:
+            console.print(f"🗑️  Removed old shard config: {path}")
+    for path in write_cluster(CLUSTER_YAML, plan, token, extra_ports):
+        console.print(f"✅ Config created: {path}")
+    console.print(f"🗺️  Cluster manifest: {CLUSTER_YAML} ({len(plan)} shards)")
+    console.print(f"🔑 Token: [bold yellow]{token}[/bold yellow]")
+    if nodes:
+        console.print(f"📤 Copy {DATA_DIR / 'cluster'}/<host>-<i>.yaml to each host and run: ft frps -c <file>")
+    console.print("\n💡 Client command:")
+    if extra_ports:
+        # Shards listen on offset tcpmux/vhost ports; clients need the manifest to find theirs
+        console.print(f"   📤 Copy {CLUSTER_YAML} to the client, then:")
+        console.print(f"   [yellow]ft client init --cluster cluster.yaml --server YOUR_SERVER_IP --token <TOKEN>{' --mux' if 'tcpmuxHTTPConnectPort' in extra_ports else ''}[/yellow]")
+        return
+    servers = ','.join(server_list({'nodes': plan}, 'YOUR_SERVER_IP'))
+    console.print(f"   [yellow]ft client init --servers {servers} --token <TOKEN> --port <PORT>[/yellow]")
+
+def _server_configs():
+    """frps configs to run on this host: local cluster shards or frps.yaml"""
+    from .core.cluster import load_cluster
+    local = [Path(n['config']) for n in load_cluster(CLUSTER_YAML).get('nodes', []) if n.get('local')]
+    return local or [SERVER_YAML]
 
 @server.command('start')
 def server_start():
@@ -195,9 +298,12 @@ def server_start():
     if not SERVER_YAML.exists():
         console.print("❌ No config. Run 'ft server init' first", style="red")
         return
-    _start_bg(_frps_bin(), SERVER_YAML)
-    import time; time.sleep(1)
-    if is_running('frps'):
+    for config in _server_configs():
+        _start_bg(_frps_bin(), config)
+    with trace.span('wait_ready'):
+        import time; time.sleep(1)
+        running = is_running('frps')
+    if running:
         console.print("✅ Server started")
     else:
         console.print("❌ Server failed to start, check log: " + str(DATA_DIR / 'frps.log'), style="red")
@@ -206,22 +312,35 @@ def server_start():
 def server_stop():
     """Stop FRP server"""
     _stop('frps')
-    console.print("✅ Server stopped")
+    import time
+    # Exit status matters to `ft fleet stop`, which runs this over ssh
+    for _ in range(20):
+        if not is_running('frps'):
+            console.print("✅ Server stopped")
+            return
+        time.sleep(0.1)
+    console.print("❌ frps is still running", style="red")
+    sys.exit(1)
 
 @server.command('reload')
 def server_reload():
     """Restart server to apply config changes"""
     if not SERVER_YAML.exists():
         console.print("❌ No config. Run 'ft server init' first", style="red")
-        return
+        sys.exit(1)
     _stop('frps')
     import time; time.sleep(1)
-    _start_bg(_frps_bin(), SERVER_YAML)
-    time.sleep(1)
-    if is_running('frps'):
+    for config in _server_configs():
+        _start_bg(_frps_bin(), config)
+    with trace.span('wait_ready'):
+        time.sleep(1)
+        running = is_running('frps')
+    if running:
         console.print("✅ Server restarted")
     else:
         console.print("❌ Server failed to start, check log: " + str(DATA_DIR / 'frps.log'), style="red")
+        # Non-zero so `ft fleet reload` reports the relay as down
+        sys.exit(1)
 
 @server.command('status')
 def server_status():
@@ -239,26 +358,45 @@ def server_status():
     if log_file.exists():
         console.print(f"   📋 Log: [cyan]{log_file}[/cyan]")
     console.print(f"   🔧 Binary: [cyan]{_frps_bin()}[/cyan]")
+    cfg = {}
+    if SERVER_YAML.exists():
+        with trace.span('parse_config'):
+            import yaml
+            with open(SERVER_YAML) as f:
+                cfg = yaml.safe_load(f) or {}
     # Active clients via API
     try:
-        import requests
-        resp = requests.get('http://localhost:7500/api/proxy/tcp', timeout=2)
-        if resp.status_code == 200:
-            proxies = [p for p in resp.json().get('proxies', []) if p.get('status') != 'offline']
-            console.print(f"   👥 Active clients: [green]{len(proxies)}[/green]")
-            for p in proxies:
-                name = p.get('name', '?')
-                port = (p.get('conf') or {}).get('remotePort', '?')
-                ver = p.get('clientVersion', '?')
-                conns = p.get('curConns', 0)
-                console.print(f"      • {name}: :{port} (v{ver}, {conns} conns)")
-    except:
+        from .core.dashboard import server_api, get_proxies, group_proxies
+        base, auth = server_api(cfg)
+        with trace.span('dashboard_api'):
+            proxies = [p for p in get_proxies(base, auth) if p.get('status') != 'offline']
+        console.print(f"   👥 Active clients: [green]{len(proxies)}[/green]")
+        for p in proxies:
+            name = p.get('name', '?')
+            port = (p.get('conf') or {}).get('remotePort', '?')
+            ver = p.get('clientVersion', '?')
+            conns = p.get('curConns', 0)
+            console.print(f"      • {name}: :{port} (v{ver}, {conns} conns)")
+        for group, members in sorted(group_proxies(proxies).items()):
+            port = (members[0].get('conf') or {}).get('remotePort', '?')
+            total = sum(m.get('curConns', 0) for m in members)
+            console.print(f"   🧩 Group {group}: :{port} ({len(members)} members, {total} conns)")
+            for m in members:
+                conns = m.get('curConns', 0)
+                share = f"{conns * 100 // total}%" if total else '-'
+                console.print(f"      • {m.get('name', '?')}: {conns} conns ({share})")
+        if cfg.get('vhostHTTPPort'):
+            from .core.vhost import http_routes
+            with trace.span('dashboard_api'):
+                routes = http_routes(get_proxies(base, auth, ('http',)), cfg)
+            console.print(f"   🌍 HTTP routes on :{cfg['vhostHTTPPort']}: [green]{len(routes)}[/green]")
+            for r in routes:
+                gz = ', gzip' if r['compressed'] else ''
+                console.print(f"      • {r['url']} → {r['name']} ({r['conns']} conns{gz})")
+    except Exception:
         pass
     # Show token (masked)
-    if SERVER_YAML.exists():
-        import yaml
-        with open(SERVER_YAML) as f:
-            cfg = yaml.safe_load(f)
+    if cfg:
         token = cfg.get('auth', {}).get('token', '')
         if len(token) > 16:
             masked = token[:8] + '*' * (len(token) - 16) + token[-8:]
@@ -273,63 +411,140 @@ def server_status():
         console.print(f"   [yellow]pip install https://gh-proxy.com/https://github.com/cicy-dev/frp-tunnel/archive/refs/heads/main.zip[/yellow]  # 国内加速")
     console.print()
 
+def _validate_cpus(ctx, param, value):
+    if value is None:
+        return None
+    from .core.tuning import parse_cpu_list
+    try:
+        parse_cpu_list(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
+
 @server.command('install')
-def server_install():
+@click.option('--tune', is_flag=True, help='Add FD limits and Go runtime settings sized to this host')
+@click.option('--cpus', default=None, callback=_validate_cpus, help='Pin frps to CPUs, e.g. 0-3 (implies --tune)')
+def server_install(tune, cpus):
     """Install as system service (systemd/launchd)"""
+    tune = tune or bool(cpus)
     if not SERVER_YAML.exists():
         console.print("❌ No config. Run 'ft server init' first", style="red")
         return
     frps = _frps_bin()
     _check_bin(frps)
+    tuning = None
+    if tune:
+        from .core.tuning import service_tuning
+        tuning = service_tuning(cpus)
+        env = ', '.join(f'{k}={v}' for k, v in tuning['env'].items())
+        console.print(f"⚙️  Tuning: LimitNOFILE={tuning['nofile']}, {env}")
+
+    # One service per local shard: frps.yaml -> frp-server, frps-1.yaml -> frp-server-1
+    configs = _server_configs()
+    suffixes = [config.stem[len('frps'):] for config in configs]
+    if len(configs) > 1:
+        console.print(f"🗺️  Installing {len(configs)} shard services")
 
     if sys.platform == 'darwin':
         # macOS launchd
-        plist_name = 'com.frp-tunnel.server'
-        plist_path = HOME / 'Library' / 'LaunchAgents' / f'{plist_name}.plist'
-        plist_path.parent.mkdir(parents=True, exist_ok=True)
-        plist = f"""<?xml version="1.0" encoding="UTF-8"?>
+        from .core.tuning import launchd_tuning
+        for config, suffix in zip(configs, suffixes):
+            plist_name = f'com.frp-tunnel.server{suffix}'
+            plist_path = HOME / 'Library' / 'LaunchAgents' / f'{plist_name}.plist'
+            plist_path.parent.mkdir(parents=True, exist_ok=True)
+            plist = f"""<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
 <plist version="1.0"><dict>
   <key>Label</key><string>{plist_name}</string>
-  <key>ProgramArguments</key><array><string>{frps}</string><string>-c</string><string>{SERVER_YAML}</string></array>
+  <key>ProgramArguments</key><array><string>{frps}</string><string>-c</string><string>{config}</string></array>
   <key>RunAtLoad</key><true/>
   <key>KeepAlive</key><true/>
-  <key>StandardOutPath</key><string>{DATA_DIR / 'frps-stdout.log'}</string>
-  <key>StandardErrorPath</key><string>{DATA_DIR / 'frps-stderr.log'}</string>
-</dict></plist>"""
-        plist_path.write_text(plist)
-        subprocess.run(['launchctl', 'load', str(plist_path)])
-        console.print(f"✅ Installed: {plist_path}")
+  <key>StandardOutPath</key><string>{DATA_DIR / f'frps{suffix}-stdout.log'}</string>
+  <key>StandardErrorPath</key><string>{DATA_DIR / f'frps{suffix}-stderr.log'}</string>
+{launchd_tuning(tuning) if tuning else ''}</dict></plist>"""
+            plist_path.write_text(plist)
+            subprocess.run(['launchctl', 'load', str(plist_path)])
+            console.print(f"✅ Installed: {plist_path}")
     elif sys.platform == 'win32':
         # Windows: create startup bat
         bat = HOME / 'AppData' / 'Roaming' / 'Microsoft' / 'Windows' / 'Start Menu' / 'Programs' / 'Startup' / 'frp-server.bat'
-        bat.write_text(f'@echo off\nstart "" "{frps}" -c "{SERVER_YAML}"\n')
+        bat.write_text('@echo off\n' + ''.join(f'start "" "{frps}" -c "{config}"\n' for config in configs))
         console.print(f"✅ Installed startup: {bat}")
     else:
         # Linux systemd
-        service = f"""[Unit]
-Description=FRP Tunnel Server
-After=network.target
-
-[Service]
-Type=simple
-User={os.getenv('USER', 'root')}
-ExecStart={frps} -c {SERVER_YAML}
-Restart=always
-RestartSec=10
-
-[Install]
-WantedBy=multi-user.target
-"""
+        from .core.tuning import systemd_unit
+        units = [f'frp-server{suffix}' for suffix in suffixes]
+        # Shard units of a previous, larger cluster would start stale configs
+        stale = [p.stem for p in Path('/etc/systemd/system').glob('frp-server-*.service') if p.stem not in units]
         try:
-            subprocess.run(['sudo', 'tee', '/etc/systemd/system/frp-server.service'], input=service, text=True, capture_output=True, check=True)
+            for unit in stale:
+                subprocess.run(['sudo', 'systemctl', 'disable', '--now', unit], capture_output=True)
+                subprocess.run(['sudo', 'rm', '-f', f'/etc/systemd/system/{unit}.service'], check=True)
+                console.print(f"🗑️  Removed old shard service: {unit}")
+            for config, unit in zip(configs, units):
+                service = systemd_unit(frps, config, os.getenv('USER', 'root'), tuning)
+                subprocess.run(['sudo', 'tee', f'/etc/systemd/system/{unit}.service'], input=service, text=True, capture_output=True, check=True)
             subprocess.run(['sudo', 'systemctl', 'daemon-reload'], check=True)
-            subprocess.run(['sudo', 'systemctl', 'enable', 'frp-server'], check=True)
-            subprocess.run(['sudo', 'systemctl', 'start', 'frp-server'], check=True)
-            console.print("✅ Installed systemd service: frp-server")
+            for unit in units:
+                subprocess.run(['sudo', 'systemctl', 'enable', unit], check=True)
+                subprocess.run(['sudo', 'systemctl', 'start', unit], check=True)
+                console.print(f"✅ Installed systemd service: {unit}")
+            if tuning:
+                console.print("💡 Check kernel settings with: ft server doctor")
         except subprocess.CalledProcessError as e:
             console.print(f"❌ Failed: {e}", style="red")
 
+@server.command('doctor')
+@click.option('--fix', is_flag=True, help='Apply recommended kernel settings (sudo)')
+def server_doctor(fix):
+    """Check kernel settings for high-connection relays"""
+    if not sys.platform.startswith('linux'):
+        console.print("⚠️  Kernel checks are only supported on Linux")
+        return
+    from .core.tuning import check_sysctls, apply_sysctls, bbr_available, nofile_limit, NOFILE_LIMIT
+    console.print("\n🩺 Server Doctor")
+    allow_ports = None
+    if SERVER_YAML.exists():
+        import yaml
+        with open(SERVER_YAML) as f:
+            allow_ports = (yaml.safe_load(f) or {}).get('allowPorts')
+    results = check_sysctls(allow_ports)
+    for r in results:
+        if r['ok']:
+            console.print(f"   ✅ {r['key']} = [cyan]{r['value']}[/cyan]")
+        elif r['value'] is None:
+            console.print(f"   ➖ {r['key']}: not available")
+        else:
+            console.print(f"   ⚠️  {r['key']} = [yellow]{r['value']}[/yellow] → {r['recommended']} ({r['why']})")
+    if not bbr_available():
+        console.print("   💡 BBR not loaded: sudo modprobe tcp_bbr")
+    try:
+        import psutil
+        pids = [p.pid for p in psutil.process_iter(['name']) if p.info['name'] in ('frps', 'frps.exe')]
+    except Exception:
+        pids = []
+    for pid in pids:
+        limit = nofile_limit(pid)
+        if limit is not None and limit < NOFILE_LIMIT:
+            console.print(f"   ⚠️  frps (pid {pid}) open files limit = [yellow]{limit}[/yellow] → run: ft server install --tune")
+        elif limit is not None:
+            console.print(f"   ✅ frps (pid {pid}) open files limit = [cyan]{limit}[/cyan]")
+    bad = [r for r in results if not r['ok'] and r['value'] is not None]
+    if not bad:
+        console.print("\n✅ All checks passed\n")
+        return
+    if not fix:
+        console.print(f"\n💡 {len(bad)} setting(s) sub-optimal. Apply with: [yellow]ft server doctor --fix[/yellow]\n")
+        return
+    try:
+        applied, failed = apply_sysctls(results)
+        console.print(f"\n✅ Applied {len(applied)} setting(s), persisted to /etc/sysctl.d/99-frp-tunnel.conf")
+        for key, error in failed.items():
+            console.print(f"   ❌ {key}: {error}", style="red")
+        console.print()
+    except subprocess.CalledProcessError as e:
+        console.print(f"❌ Failed: {e}", style="red")
+
 # ─── CLIENT ───
 
 @cli.group(context_settings=CTX)
@@ -341,28 +556,120 @@ def client():
 @click.option('--server', default='YOUR_SERVER_IP', help='Server address')
 @click.option('--token', default='YOUR_TOKEN', help='Auth token')
 @click.option('--port', default=6022, type=int, help='Remote SSH port')
+@click.option('--servers', default=None, help='Cluster shards host:port,... (picked by consistent hash)')
+@click.option('--cluster', 'cluster_file', type=click.Path(exists=True, dir_okay=False, path_type=Path), default=None,
+              help="Server's cluster.yaml: pick a shard and its tcpmux port (--server is the address of local shards)")
+@click.option('--mux', is_flag=True, help='Register a tcpmux proxy by hostname instead of a remote port')
+@click.option('--hostname', default=None, help='Name to route by with --mux/--p2p (default: this host)')
+@click.option('--p2p', is_flag=True, help='Generate an xtcp (P2P) proxy with stcp relay fallback')
+@click.option('--secret', default=None, help='Secret key for --p2p (default: random)')
+@click.option('--group', default=None, help='Join a load-balanced group sharing --port with other clients')
+@click.option('--group-key', default=None, help='Group key (default: derived from token and group)')
+@click.option('--limit', default=None, help='Bandwidth limit for the proxy, e.g. 10MB or 512KB')
+@click.option('--limit-mode', type=click.Choice(['server', 'client']), default='server', help='Where --limit is enforced')
+@click.option('--health-check', type=click.Choice(['tcp', 'http']), default=None, help='Let frp take the proxy offline when the local service fails')
+@click.option('--health-interval', default=10, type=click.IntRange(1), help='Seconds between health checks')
+@click.option('--health-max-failed', default=3, type=click.IntRange(1), help='Failures before the proxy goes offline')
+@click.option('--health-path', default='/', help='URL path for --health-check http')
 @click.option('--force', '-f', is_flag=True, help='Overwrite existing config')
-def client_init(server, token, port, force):
+def client_init(server, token, port, servers, cluster_file, mux, hostname, p2p, secret, group, group_key, limit, limit_mode,
+                health_check, health_interval, health_max_failed, health_path, force):
     """Generate client config (frpc.yaml)"""
     _ensure_binaries()
     if CLIENT_YAML.exists() and not force:
         console.print(f"⚠️  Config exists: {CLIENT_YAML} (use -f to overwrite)")
         return
     import yaml
+    import socket
+    extra = []
+    if mux:
+        from .core.mux import mux_proxy
+        proxy = mux_proxy(hostname or socket.gethostname())
+    elif p2p:
+        from .core.p2p import p2p_proxies
+        secret = secret or secrets.token_urlsafe(16)
+        proxy, *extra = p2p_proxies(f'p2p_{hostname or socket.gethostname()}', secret)
+    elif group:
+        import hashlib
+        # Members need distinct proxy names but the same group, key and port
+        proxy = {
+            'name': f'{group}_{hostname or socket.gethostname()}',
+            'type': 'tcp', 'localIP': '127.0.0.1', 'localPort': 22, 'remotePort': port,
+            'loadBalancer': {
+                'group': group,
+                'groupKey': group_key or hashlib.sha256(f'{token}:{group}'.encode()).hexdigest()[:32],
+            },
+            'healthCheck': {'type': 'tcp', 'timeoutSeconds': 3, 'maxFailed': 3, 'intervalSeconds': 10},
+        }
+    else:
+        proxy = {'name': f'ssh_{port}', 'type': 'tcp', 'localIP': '127.0.0.1', 'localPort': 22, 'remotePort': port}
+    if health_check:
+        from .core.failover import health_check as make_check
+        proxy['healthCheck'] = make_check(health_check, health_interval, health_max_failed, path=health_path)
+    if limit:
+        from .core.bandwidth import parse_rate, format_rate
+        try:
+            proxy['transport'] = {'bandwidthLimit': format_rate(parse_rate(limit)), 'bandwidthLimitMode': limit_mode}
+        except ValueError as e:
+            console.print(f"❌ {e}", style="red")
+            return
+    server_port = 7000
+    shard_meta = {}
+    # Group members must share one frps to be load-balanced: hash the group
+    shard_key = group or proxy['name']
+    if cluster_file:
+        from .core.cluster import load_cluster, pick_node, server_list
+        manifest = load_cluster(cluster_file)
+        if not manifest.get('nodes'):
+            console.print(f"❌ No shards in {cluster_file}", style="red")
+            return
+        shard_servers = server_list(manifest, server)
+        node = pick_node(manifest, server, shard_key)
+        server, server_port = node.get('addr') or server, node['bindPort']
+        if mux:
+            if not node.get('tcpmuxHTTPConnectPort'):
+                console.print("❌ Cluster has no tcpmux port (server init --mux)", style="red")
+                return
+            # ssh-config reads this to aim ProxyCommand at this shard's tcpmux port
+            proxy['metadatas'] = {'muxPort': str(node['tcpmuxHTTPConnectPort'])}
+        # expose-http reads these to print the URLs this shard serves
+        shard_meta = {key: str(node[key]) for key in ('vhostHTTPPort', 'subdomainHost') if node.get(key)}
+        console.print(f"🗺️  Shard for {f'group {group}' if group else proxy['name']}: [cyan]{node['name']} ({server}:{server_port})[/cyan]")
+    elif servers:
+        from .core.cluster import parse_servers, pick_server
+        shard_servers = parse_servers(servers)
+        shard = pick_server(shard_servers, shard_key)
+        server, server_port = shard.rsplit(':', 1)
+        server_port = int(server_port)
+        console.print(f"🗺️  Shard for {f'group {group}' if group else proxy['name']}: [cyan]{shard}[/cyan]")
+        if mux:
+            console.print("⚠️  --servers does not know each shard's tcpmux port; use --cluster cluster.yaml", style="yellow")
     config = {
         'serverAddr': server,
-        'serverPort': 7000,
+        'serverPort': server_port,
         'auth': {'token': token},
         'log': {'to': str(DATA_DIR / 'frpc.log'), 'level': 'info'},
         'webServer': {'addr': '127.0.0.1', 'port': 7400},
-        'proxies': [
-            {'name': f'ssh_{port}', 'type': 'tcp', 'localIP': '127.0.0.1', 'localPort': 22, 'remotePort': port}
-        ]
+        'proxies': [proxy] + extra
     }
-    with open(CLIENT_YAML, 'w') as f:
-        yaml.dump(config, f, default_flow_style=False)
+    if cluster_file or servers:
+        # client visit hashes a proxy name over these to find its shard
+        shard_meta['ftServers'] = ','.join(shard_servers)
+    if shard_meta:
+        config['metadatas'] = shard_meta
+    with trace.span('write_config'):
+        with open(CLIENT_YAML, 'w') as f:
+            yaml.dump(config, f, default_flow_style=False)
     console.print(f"✅ Config created: {CLIENT_YAML}")
-    console.print(f"📝 Edit config to add more proxies, then: ft client start")
+    if mux:
+        console.print(f"🔀 tcpmux host: [cyan]{proxy['customDomains'][0]}[/cyan] (connect with: ft ssh-config{'' if cluster_file else ' --mux-port <PORT>'})")
+    if group:
+        console.print(f"🧩 Group [cyan]{group}[/cyan] on :{port} as {proxy['name']} (tcp health check every 10s)")
+    if p2p:
+        console.print(f"🔗 P2P proxy: [cyan]{proxy['name']}[/cyan] (stcp relay fallback: {extra[0]['name']})")
+        console.print("💡 On the visiting machine:")
+        console.print(f"   [yellow]ft client visit {proxy['name']} --secret {secret} --bind 127.0.0.1:6000[/yellow]")
+    console.print("📝 Edit config to add more proxies, then: ft client start")
 
 @client.command('start')
 def client_start():
@@ -374,8 +681,10 @@ def client_start():
         console.print("❌ No config. Run 'ft client init' first", style="red")
         return
     _start_bg(_frpc_bin(), CLIENT_YAML)
-    import time; time.sleep(1)
-    if is_running('frpc'):
+    with trace.span('wait_ready'):
+        import time; time.sleep(1)
+        running = is_running('frpc')
+    if running:
         console.print("✅ Client started")
     else:
         console.print("❌ Client failed to start, check log: " + str(DATA_DIR / 'frpc.log'), style="red")
@@ -391,12 +700,321 @@ def client_reload():
     """Hot-reload client config"""
     frpc = _frpc_bin()
     _check_bin(frpc)
-    result = subprocess.run([str(frpc), 'reload', '-c', str(CLIENT_YAML)], capture_output=True, text=True)
+    with trace.span('frpc_reload'):
+        result = subprocess.run([str(frpc), 'reload', '-c', str(CLIENT_YAML)], capture_output=True, text=True)
     if result.returncode == 0:
         console.print("✅ Client config reloaded")
     else:
         console.print(f"❌ Reload failed: {result.stderr.strip()}", style="red")
 
+@client.command('visit')
+@click.argument('name')
+@click.option('--secret', required=True, help='Secret key of the P2P proxy')
+@click.option('--bind', 'bind', default='127.0.0.1:6000', help='Local address to listen on')
+@click.option('--server-user', default=None, help='frp user of the proxy owner, if set')
+@click.option('--no-fallback', is_flag=True, help='Fail instead of falling back to the relay')
+@click.option('--servers', default=None, help='Cluster shards host:port,... (default: from client init --servers/--cluster)')
+@click.option('--cluster', 'cluster_file', type=click.Path(exists=True, dir_okay=False, path_type=Path), default=None,
+              help="Server's cluster.yaml to find NAME's shard")
+@click.option('--server', default=None, help='Address of local shards in --cluster (default: serverAddr)')
+def client_visit(name, secret, bind, server_user, no_fallback, servers, cluster_file, server):
+    """Add a P2P visitor for proxy NAME (xtcp, relay fallback)
+
+    Visitors must connect to the frps holding NAME. In a cluster, NAME's
+    shard is found with the same hash as client init; if it is not the
+    shard frpc.yaml connects to, the visitors go to a separate
+    frpc-<host>-<port>.yaml for that shard.
+    """
+    if not CLIENT_YAML.exists():
+        console.print("❌ No config. Run 'ft client init --server ... --token ...' first", style="red")
+        return
+    import yaml
+    from .core.p2p import p2p_visitors, merge_visitors
+    from .core.cluster import load_cluster, parse_servers, pick_server, server_list
+    bind_addr, _, bind_port = bind.rpartition(':')
+    if not bind_port.isdigit():
+        console.print(f"❌ Invalid --bind: {bind} (expected ADDR:PORT)", style="red")
+        return
+    with open(CLIENT_YAML) as f:
+        cfg = yaml.safe_load(f) or {}
+    if cluster_file:
+        shards = server_list(load_cluster(cluster_file), server or cfg.get('serverAddr', '127.0.0.1'))
+    else:
+        shards = parse_servers(servers or (cfg.get('metadatas') or {}).get('ftServers', ''))
+    visitors = p2p_visitors(name, secret, bind_addr or '127.0.0.1', int(bind_port), server_user, not no_fallback)
+    current = f"{cfg.get('serverAddr', '127.0.0.1')}:{cfg.get('serverPort', 7000)}"
+    shard = pick_server(shards, name) if shards else current
+    if shard != current:
+        host, port = shard.rsplit(':', 1)
+        path = DATA_DIR / f'frpc-{host}-{port}.yaml'
+        console.print(f"🗺️  {name} is on shard [cyan]{shard}[/cyan], frpc.yaml connects to {current}")
+        shard_cfg = {'serverAddr': host, 'serverPort': int(port), 'auth': cfg.get('auth', {}),
+                     'log': {'to': str(DATA_DIR / f'frpc-{host}-{port}.log'), 'level': 'info'}}
+        if cfg.get('user'):
+            shard_cfg['user'] = cfg['user']
+        if path.exists():
+            with open(path) as f:
+                shard_cfg = yaml.safe_load(f) or shard_cfg
+        with open(path, 'w') as f:
+            yaml.dump(merge_visitors(shard_cfg, visitors), f, default_flow_style=False)
+        console.print(f"✅ Visitor added to {path}: {visitors[0]['name']} → {bind_addr or '127.0.0.1'}:{bind_port}")
+        console.print(f"💡 Run it with: [yellow]ft frpc -c {path}[/yellow]")
+        return
+    _patch_client_config(lambda fresh: merge_visitors(fresh, visitors))
+    console.print(f"✅ Visitor added: {visitors[0]['name']} → {bind_addr or '127.0.0.1'}:{bind_port}")
+    _reload_if_running()
+
+def _reload_if_running():
+    """Hot-reload frpc after a config edit; returns True if reloaded"""
+    if not is_running('frpc'):
+        console.print("📝 Start the client: ft client start")
+        return False
+    with trace.span('frpc_reload'):
+        result = subprocess.run([str(_frpc_bin()), 'reload', '-c', str(CLIENT_YAML)], capture_output=True, text=True)
+    if result.returncode != 0:
+        console.print(f"❌ Reload failed: {result.stderr.strip()}", style="red")
+        return False
+    console.print("✅ Client config reloaded")
+    return True
+
+def _patch_client_config(patch):
+    """Re-read frpc.yaml, apply patch(cfg) and write it back atomically
+
+    Long-running commands call this instead of dumping a config they read
+    at startup, so edits made meanwhile (ft client limit/health/expose-http,
+    a text editor) survive. patch returns False to leave the file alone.
+    """
+    import yaml
+    with open(CLIENT_YAML) as f:
+        cfg = yaml.safe_load(f) or {}
+    if patch(cfg) is False:
+        return None
+    tmp = CLIENT_YAML.with_name(f'.{CLIENT_YAML.name}.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        yaml.dump(cfg, f, default_flow_style=False)
+    os.replace(str(tmp), str(CLIENT_YAML))
+    return cfg
+
+@client.command('limit')
+@click.argument('name')
+@click.argument('rate')
+@click.option('--mode', type=click.Choice(['server', 'client']), default='server', help='Where the limit is enforced (frps or frpc)')
+def client_limit(name, rate, mode):
+    """Set proxy NAME's bandwidth limit (e.g. 10MB, 512KB, off)"""
+    if not CLIENT_YAML.exists():
+        console.print("❌ No config. Run 'ft client init' first", style="red")
+        return
+    from .core.bandwidth import parse_rate, format_rate, set_limit
+    try:
+        value = parse_rate(rate)
+    except ValueError as e:
+        console.print(f"❌ {e}", style="red")
+        return
+    if _patch_client_config(lambda cfg: set_limit(cfg, name, value, mode)) is None:
+        console.print(f"❌ No proxy named {name} in {CLIENT_YAML}", style="red")
+        return
+    console.print(f"✅ {name}: {f'{format_rate(value)}/s ({mode})' if value else 'unlimited'}")
+    _reload_if_running()
+
+@client.command('shape')
+@click.option('--policy', 'policy_file', type=click.Path(dir_okay=False), default=None, help='Policy file (default: ~/data/frp/bandwidth.yaml)')
+@click.option('--interval', default=5.0, type=float, help='Seconds between counter samples')
+@click.option('--dry-run', is_flag=True, help='Print decisions without changing frpc.yaml')
+def client_shape(policy_file, interval, dry_run):
+    """Adjust bulk proxy limits from dashboard traffic (policy classes)"""
+    if not CLIENT_YAML.exists():
+        console.print("❌ No config. Run 'ft client init' first", style="red")
+        return
+    import time
+    import yaml
+    import requests
+    from .core.bandwidth import load_policy, current_limits, set_limit, format_rate, Shaper
+    from .core.dashboard import server_api, get_proxies
+    path = Path(policy_file) if policy_file else DATA_DIR / 'bandwidth.yaml'
+    try:
+        policy = load_policy(path)
+    except (ValueError, yaml.YAMLError) as e:
+        console.print(f"❌ {path}: {e}", style="red")
+        return
+    with open(CLIENT_YAML) as f:
+        cfg = yaml.safe_load(f) or {}
+    dash = policy['dashboard'] or {}
+    if dash.get('url'):
+        base = dash['url'].rstrip('/')
+        auth = (dash['user'], dash.get('password', '')) if dash.get('user') else None
+    elif SERVER_YAML.exists():
+        with open(SERVER_YAML) as f:
+            base, auth = server_api(yaml.safe_load(f) or {})
+    else:
+        base, auth = f"http://{cfg.get('serverAddr', '127.0.0.1')}:7500", None
+    # frps names proxies "<user>.<name>" when the client sets a user
+    prefix = f"{cfg['user']}." if cfg.get('user') else ''
+    shaper = Shaper(policy, current_limits(cfg), prefix)
+    rate = lambda v: f"{format_rate(v)}/s" if v else 'unlimited'
+    console.print(f"🎚️  Shaping {len(shaper.limits)} proxies from {base} every {interval:g}s (capacity {format_rate(policy['capacity'])}/s)")
+    try:
+        while True:
+            try:
+                # All of them: other clients' traffic shares the link too
+                proxies = [p for p in get_proxies(base, auth, ('tcp', 'http', 'tcpmux')) if p.get('name')]
+            except (requests.RequestException, ValueError) as e:
+                click.echo(f"dashboard unreachable: {base} ({e})", err=True)
+                proxies = None
+            if proxies is not None:
+                if not dry_run:
+                    # Start from what frpc.yaml says now: limits or proxies may have been edited
+                    with open(CLIENT_YAML) as f:
+                        shaper.limits = current_limits(yaml.safe_load(f) or {})
+                decision = shaper.step(proxies)
+                changes = decision['changes']
+                for name, (old, new) in changes.items():
+                    console.print(f"{time.strftime('%H:%M:%S')} {decision['action']:<7} {name}: {rate(old)} → {rate(new)} "
+                                  f"(link {decision['rate'] / 1048576:.1f} MB/s, interactive: {', '.join(decision['interactive']) or '-'})")
+                if changes and not dry_run:
+                    def apply(fresh):
+                        # Only the changed proxies' transport limits are touched
+                        found = [set_limit(fresh, name, new, policy['mode']) for name, (_, new) in changes.items()]
+                        return any(found)
+                    if _patch_client_config(apply):
+                        _reload_if_running()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+@client.command('expose-http')
+@click.argument('name')
+@click.option('--local', 'local_port', required=True, type=int, help='Local port of the web service')
+@click.option('--local-ip', default='127.0.0.1', help='Local address of the web service')
+@click.option('--domain', 'domains', multiple=True, help='Custom domain to route (repeatable)')
+@click.option('--subdomain', default=None, help='Subdomain under the server\'s subdomainHost (default: NAME)')
+@click.option('--location', 'locations', multiple=True, help='Only route these URL path prefixes (repeatable)')
+@click.option('--compress', is_flag=True, help='Compress traffic between frpc and frps')
+@click.option('--host-rewrite', default=None, help='Rewrite the Host header, e.g. localhost')
+def client_expose_http(name, local_port, local_ip, domains, subdomain, locations, compress, host_rewrite):
+    """Expose a local web UI as an http proxy on the shared vhost port"""
+    if not CLIENT_YAML.exists():
+        console.print("❌ No config. Run 'ft client init' first", style="red")
+        return
+    import yaml
+    from .core.vhost import http_proxy, upsert_proxy, route_hosts, route_urls
+    if not domains and not subdomain:
+        subdomain = name
+    proxy = http_proxy(name, local_port, local_ip, domains, subdomain, compress, host_rewrite, locations)
+    with open(CLIENT_YAML) as f:
+        cfg = yaml.safe_load(f) or {}
+    try:
+        replaced = upsert_proxy(cfg, proxy)
+    except ValueError as e:
+        console.print(f"❌ {e}; pick another name", style="red")
+        return
+    with open(CLIENT_YAML, 'w') as f:
+        yaml.dump(cfg, f, default_flow_style=False)
+    shard = cfg.get('metadatas') or {}
+    if shard.get('vhostHTTPPort'):
+        routes = route_urls(proxy, int(shard['vhostHTTPPort']), shard.get('subdomainHost'))
+    else:
+        routes = route_hosts(proxy)
+    console.print(f"✅ {'Updated' if replaced else 'Added'} http proxy {name}: {', '.join(routes)} → {local_ip}:{local_port}")
+    _reload_if_running()
+
+@client.command('health')
+@click.argument('name')
+@click.option('--type', 'kind', type=click.Choice(['tcp', 'http', 'off']), default='tcp', help='Check type (off: remove)')
+@click.option('--interval', default=10, type=click.IntRange(1), help='Seconds between checks')
+@click.option('--max-failed', default=3, type=click.IntRange(1), help='Failures before the proxy goes offline')
+@click.option('--timeout', default=3, type=click.IntRange(1), help='Seconds per check')
+@click.option('--path', default='/', help='URL path for http checks')
+def client_health(name, kind, interval, max_failed, timeout, path):
+    """Set or remove the health check of proxy NAME"""
+    if not CLIENT_YAML.exists():
+        console.print("❌ No config. Run 'ft client init' first", style="red")
+        return
+    import yaml
+    from .core.failover import health_check, find_proxy
+    with open(CLIENT_YAML) as f:
+        cfg = yaml.safe_load(f) or {}
+    proxy = find_proxy(cfg, name)
+    if proxy is None:
+        console.print(f"❌ No proxy named {name} in {CLIENT_YAML}", style="red")
+        return
+    if kind == 'off':
+        proxy.pop('healthCheck', None)
+        console.print(f"✅ {name}: health check removed")
+    else:
+        proxy['healthCheck'] = health_check(kind, interval, max_failed, timeout, path)
+        console.print(f"✅ {name}: {kind} check every {interval}s, offline after {max_failed} failures")
+    with open(CLIENT_YAML, 'w') as f:
+        yaml.dump(cfg, f, default_flow_style=False)
+    _reload_if_running()
+
+@client.command('failover')
+@click.argument('name')
+@click.option('--standby', multiple=True, required=True, help='Standby local target HOST:PORT (repeatable, tried in order)')
+@click.option('--interval', default=2.0, type=float, help='Seconds between probes')
+@click.option('--max-failed', default=3, type=click.IntRange(1), help='Consecutive failures before switching')
+@click.option('--timeout', default=1.0, type=float, help='Seconds per probe')
+@click.option('--failback', is_flag=True, help='Return to the primary target once it is healthy again')
+def client_failover(name, standby, interval, max_failed, timeout, failback):
+    """Switch proxy NAME to a standby local target when it fails"""
+    if not CLIENT_YAML.exists():
+        console.print("❌ No config. Run 'ft client init' first", style="red")
+        return
+    import time
+    import yaml
+    from .core.failover import find_proxy, parse_target, set_target, probe, Failover, SwitchLog
+    with open(CLIENT_YAML) as f:
+        cfg = yaml.safe_load(f) or {}
+    proxy = find_proxy(cfg, name)
+    if proxy is None:
+        console.print(f"❌ No proxy named {name} in {CLIENT_YAML}", style="red")
+        return
+    try:
+        standbys = [parse_target(t) for t in standby]
+    except ValueError as e:
+        console.print(f"❌ {e}", style="red")
+        return
+    active = (proxy.get('localIP', '127.0.0.1'), int(proxy.get('localPort', 22)))
+    # The primary survives restarts of this command after a switch
+    primary_text = (proxy.get('metadatas') or {}).get('ftPrimaryTarget', '%s:%d' % active)
+    primary = parse_target(primary_text)
+    targets = [primary] + [t for t in standbys if t != primary]
+    check = proxy.get('healthCheck') or {}
+    kind = 'http' if check.get('type') == 'http' else 'tcp'
+    monitor = Failover(name, targets, active, max_failed, failback,
+                       lambda t: probe(t, kind, timeout, check.get('path', '/')))
+    log = SwitchLog(DATA_DIR / 'failover.log')
+    console.print(f"🛟 Watching {name} → {'%s:%d' % active} ({kind}, every {interval:g}s, "
+                  f"switch after {max_failed} failures; standby: {', '.join(standby)})")
+    try:
+        while True:
+            event = monitor.step()
+            if event:
+                def apply(fresh):
+                    # Patch only this proxy's target in the current file
+                    fresh_proxy = find_proxy(fresh, name)
+                    if fresh_proxy is None:
+                        return False
+                    set_target(fresh_proxy, monitor.active)
+                    fresh_proxy.setdefault('metadatas', {}).setdefault('ftPrimaryTarget', primary_text)
+                if _patch_client_config(apply) is None:
+                    console.print(f"❌ {name} is no longer in {CLIENT_YAML}, stopping", style="red")
+                    break
+                event['reloaded'] = _reload_if_running()
+                log.append(event)
+                console.print(f"{time.strftime('%H:%M:%S')} 🔀 {name}: {event['from']} → {event['to']} ({event['reason']})")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+def _proxy_endpoint(p):
+    """Remote port, or routed hostname for tcpmux/http proxies"""
+    if p.get('remotePort'):
+        return p['remotePort']
+    hosts = list(p.get('customDomains') or [])
+    if p.get('subdomain'):
+        hosts.append(f"{p['subdomain']}.*")
+    return ','.join(hosts) or '?'
+
 @client.command('status')
 def client_status():
     """Show client status"""
@@ -404,25 +1022,32 @@ def client_status():
     if not is_running('frpc'):
         console.print("📱 Client: [red]Disconnected[/red]")
         if CLIENT_YAML.exists():
-            import yaml
-            with open(CLIENT_YAML) as f:
-                cfg = yaml.safe_load(f)
+            with trace.span('parse_config'):
+                import yaml
+                with open(CLIENT_YAML) as f:
+                    cfg = yaml.safe_load(f)
             console.print(f"   📄 Config: [cyan]{CLIENT_YAML}[/cyan]")
             console.print(f"   🌐 Server: [cyan]{cfg.get('serverAddr', '?')}:{cfg.get('serverPort', 7000)}[/cyan]")
-            ports = [p.get('remotePort', '?') for p in cfg.get('proxies', [])]
+            ports = [_proxy_endpoint(p) for p in cfg.get('proxies', [])]
             if ports:
                 console.print(f"   🔌 Ports: [cyan]{', '.join(map(str, ports))}[/cyan]")
         console.print()
         return
     console.print("📱 Client: [green]Connected[/green]")
     if CLIENT_YAML.exists():
-        import yaml
-        with open(CLIENT_YAML) as f:
-            cfg = yaml.safe_load(f)
+        with trace.span('parse_config'):
+            import yaml
+            with open(CLIENT_YAML) as f:
+                cfg = yaml.safe_load(f)
         console.print(f"   🌐 Server: [cyan]{cfg.get('serverAddr', '?')}:{cfg.get('serverPort', 7000)}[/cyan]")
-        ports = [p.get('remotePort', '?') for p in cfg.get('proxies', [])]
+        ports = [_proxy_endpoint(p) for p in cfg.get('proxies', [])]
         if ports:
             console.print(f"   🔌 Ports: [cyan]{', '.join(map(str, ports))}[/cyan]")
+        if cfg.get('visitors'):
+            from .core.p2p import p2p_modes
+            colors = {'direct': 'green', 'relay': 'yellow', 'unknown': 'dim'}
+            for name, mode in p2p_modes(cfg, DATA_DIR / 'frpc.log').items():
+                console.print(f"   🔗 {name}: [{colors[mode]}]{mode}[/{colors[mode]}]")
     console.print(f"   📄 Config: [cyan]{CLIENT_YAML}[/cyan]")
     log_file = DATA_DIR / 'frpc.log'
     if log_file.exists():
@@ -430,6 +1055,274 @@ def client_status():
     console.print(f"   🔧 Binary: [cyan]{_frpc_bin()}[/cyan]")
     console.print()
 
+@client.command('watch')
+@click.option('--webhook', default=None, help='POST batched events to this URL instead of stdout')
+@click.option('--interval', default=1.0, type=float, help='Base poll interval (seconds)')
+@click.option('--debounce', default=0.0, type=float, help='Report a state only after it held this long')
+@click.option('--batch-size', default=50, type=int, help='Webhook: max events per POST')
+@click.option('--batch-interval', default=2.0, type=float, help='Webhook: max seconds to hold events')
+@click.option('--once', is_flag=True, help='Print current states and exit')
+def client_watch(webhook, interval, debounce, batch_size, batch_interval, once):
+    """Stream proxy state changes (JSON lines)"""
+    if not CLIENT_YAML.exists():
+        console.print("❌ No config. Run 'ft client init' first", style="red")
+        return
+    import yaml
+    from .core.dashboard import client_api
+    from .core.watch import watch, json_lines, WebhookSink
+    with open(CLIENT_YAML) as f:
+        base, auth = client_api(yaml.safe_load(f) or {})
+    sink = WebhookSink(webhook, batch_size, batch_interval) if webhook else None
+
+    def emit(events):
+        if sink is None:
+            sys.stdout.write(json_lines(events))
+            sys.stdout.flush()
+            return
+        sink.add(events)
+        if sink.due() and not sink.flush():
+            click.echo(f"webhook POST failed, {webhook} (will retry)", err=True)
+
+    def on_error(msg):
+        click.echo(f"admin API unreachable: {base} ({msg})", err=True)
+        # Deliver the outage (and anything buffered before it) right away
+        if sink is not None and not sink.flush():
+            click.echo(f"webhook POST failed, {webhook} (will retry)", err=True)
+
+    try:
+        watch(base, emit, auth, interval, debounce, once, on_error)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sink is not None:
+            sink.flush()
+
+def _stats(name, watch, interval):
+    """Sample frps/frpc resources, record them and show current values + trends"""
+    import time
+    import psutil
+    from .core.sampler import find_processes, sample, aggregate, RingBuffer, trend, fd_warning
+    history = RingBuffer(DATA_DIR / 'stats' / f'{name}.jsonl')
+    mib = lambda b: f"{b / 1048576:.1f} MiB"
+    while True:
+        samples = []
+        for proc in find_processes(name):
+            try:
+                samples.append(sample(proc))
+            except psutil.Error:
+                continue
+        if not samples:
+            console.print(f"❌ {name} is not running", style="red")
+            return
+        current = aggregate(samples)
+        history.append(current)
+        hist = list(history.samples)
+        span = (hist[-1]['ts'] - hist[0]['ts']) / 60 if len(hist) > 1 else 0
+        console.print(f"\n📈 {name} stats (pid {', '.join(map(str, current['pids']))}, {len(hist)} samples over {span:.0f} min)")
+        rows = [
+            ('CPU', 'cpu', lambda v: f"{v:.1f}%"),
+            ('RSS', 'rss', mib),
+            ('Open FDs', 'fds', str),
+            ('Threads', 'threads', str),
+        ]
+        for label, key, fmt in rows:
+            t = trend(hist, key)
+            if t is None:
+                console.print(f"   {label:<9} n/a")
+                continue
+            arrow = '↑' if t['delta'] > 0 else '↓' if t['delta'] < 0 else '→'
+            console.print(f"   {label:<9} [cyan]{fmt(t['last'])}[/cyan]  {arrow} min {fmt(t['min'])}, max {fmt(t['max'])}")
+        socks = current['sockets']
+        detail = ', '.join(f"{k} {v}" for k, v in sorted(socks.items()) if k != 'total')
+        console.print(f"   {'Sockets':<9} [cyan]{socks.get('total', 0)}[/cyan]  {detail}")
+        for s in samples:
+            warning = fd_warning(s)
+            if warning:
+                console.print(f"   ⚠️  pid {s['pid']}: {warning}", style="yellow")
+        if not watch:
+            console.print()
+            return
+        try:
+            time.sleep(interval)
+        except KeyboardInterrupt:
+            console.print()
+            return
+
+@server.command('stats')
+@click.option('--watch', '-w', is_flag=True, help='Keep sampling')
+@click.option('--interval', default=10.0, type=float, help='Seconds between samples with --watch')
+def server_stats(watch, interval):
+    """Show frps CPU, memory, FD, thread and socket usage"""
+    _stats('frps', watch, interval)
+
+@client.command('stats')
+@click.option('--watch', '-w', is_flag=True, help='Keep sampling')
+@click.option('--interval', default=10.0, type=float, help='Seconds between samples with --watch')
+def client_stats(watch, interval):
+    """Show frpc CPU, memory, FD, thread and socket usage"""
+    _stats('frpc', watch, interval)
+
+# ─── CLUSTER ───
+
+@cli.group(context_settings=CTX)
+def cluster():
+    """Manage sharded frps cluster"""
+    pass
+
+@cluster.command('status')
+@click.option('--timeout', default=3.0, type=float, help='Per-node API timeout (seconds)')
+def cluster_status(timeout):
+    """Aggregate every shard's dashboard API"""
+    from .core.cluster import load_cluster, node_api
+    from .core.dashboard import query_nodes
+    manifest = load_cluster(CLUSTER_YAML)
+    if not manifest.get('nodes'):
+        console.print("❌ No cluster. Run 'ft server init --shards N' or '--nodes ...' first", style="red")
+        return
+    nodes = [node_api(n) for n in manifest['nodes']]
+    results = query_nodes(nodes, timeout=timeout)
+    console.print(f"\n🗺️  Cluster Status ({len(results)} shards)")
+    total_proxies = total_conns = up = 0
+    for r in results:
+        if 'error' in r:
+            console.print(f"   ❌ {r['name']}: [red]unreachable[/red] ({r['api']})")
+            continue
+        up += 1
+        online = [p for p in r['proxies'] if p.get('status') != 'offline']
+        conns = sum(p.get('curConns', 0) for p in online)
+        clients = r['info'].get('clientCounts', 0)
+        total_proxies += len(online)
+        total_conns += conns
+        console.print(f"   ✅ {r['name']}: [green]{len(online)}[/green] proxies, {clients} clients, {conns} conns")
+    console.print(f"\n   Σ {up}/{len(results)} up, {total_proxies} proxies, {total_conns} conns\n")
+
+# ─── FLEET ───
+
+@cli.group(context_settings=CTX)
+def fleet():
+    """Manage many clients/servers from an inventory"""
+    pass
+
+@fleet.command('render')
+@click.argument('inventory', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--out', 'out_dir', required=True, type=click.Path(file_okay=False, path_type=Path), help='Output directory')
+@click.option('--workers', default=8, type=int, help='Parallel writers')
+@click.option('--prune', is_flag=True, help='Delete configs of hosts removed from the inventory')
+def fleet_render(inventory, out_dir, workers, prune):
+    """Render per-host frpc configs from an inventory"""
+    from .core.fleet import load_inventory, render_fleet, server_token
+    try:
+        inv = load_inventory(inventory)
+        counts = {}
+        for host, action in render_fleet(inv, out_dir, workers, prune):
+            counts[action] = counts.get(action, 0) + 1
+            if action != 'unchanged':
+                console.print(f"   {'📝' if action == 'written' else '🗑️ '} {host}: {action}")
+    except (ValueError, OSError) as e:
+        console.print(f"❌ {e}", style="red")
+        sys.exit(1)
+    summary = ', '.join(f'{n} {a}' for a, n in sorted(counts.items())) or 'no hosts'
+    console.print(f"✅ Rendered to {out_dir}: {summary}")
+    console.print(f"🔐 Server: set auth.token to [bold yellow]{server_token(inv)}[/bold yellow] and merge "
+                  f"{out_dir / 'frps-allowports.yaml'} + {out_dir / 'frps-plugins.yaml'}")
+    console.print(f"🛂 Per-host keys are checked by: [yellow]ft fleet auth {inventory}[/yellow]")
+
+@fleet.command('auth')
+@click.argument('inventory', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--bind', default=None, help='Listen address (default: server.pluginAddr or 127.0.0.1:9001)')
+def fleet_auth(inventory, bind):
+    """frps Login plugin: accept only hosts with a valid per-host fleetKey"""
+    import time
+    from .core.fleet import load_inventory, serve_login_plugin, DEFAULT_PLUGIN_ADDR
+    try:
+        inv = load_inventory(inventory)
+    except (ValueError, OSError) as e:
+        console.print(f"❌ {e}", style="red")
+        sys.exit(1)
+    addr, _, port = (bind or inv['server'].get('pluginAddr', DEFAULT_PLUGIN_ADDR)).rpartition(':')
+
+    def log(user, reason):
+        status = f"[red]rejected[/red] ({reason})" if reason else "[green]accepted[/green]"
+        console.print(f"{time.strftime('%H:%M:%S')} login {user}: {status}")
+
+    console.print(f"🛂 Fleet login plugin on {addr or '127.0.0.1'}:{port} (inventory re-read on change)")
+    try:
+        serve_login_plugin(inventory, addr or '127.0.0.1', int(port), log)
+    except KeyboardInterrupt:
+        pass
+
+def _human_bytes(n):
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB'):
+        if n < 1024 or unit == 'TiB':
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+
+def _load_hosts(hosts_file):
+    from .core.fleet_ops import load_hosts
+    try:
+        hosts = load_hosts(hosts_file)
+    except (ValueError, OSError) as e:
+        console.print(f"❌ {e}", style="red")
+        sys.exit(1)
+    if not hosts:
+        console.print(f"❌ No hosts in {hosts_file}", style="red")
+        sys.exit(1)
+    return hosts
+
+@fleet.command('status')
+@click.argument('hosts_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--deadline', default=3.0, type=click.FloatRange(0, min_open=True), help='Per-host deadline (seconds)')
+@click.option('--parallel', default=64, type=click.IntRange(1), help='Max concurrent hosts')
+@click.option('--json', 'as_json', is_flag=True, help='Print one JSON document')
+def fleet_status(hosts_file, deadline, parallel, as_json):
+    """Query every server's dashboard concurrently"""
+    from .core.fleet_ops import fleet_status as query
+    result = query(_load_hosts(hosts_file), deadline, parallel)
+    if as_json:
+        import json
+        click.echo(json.dumps(result, indent=2))
+        return
+    t = result['totals']
+    console.print(f"\n🌍 Fleet Status ({t['up']}/{t['hosts']} up)")
+    for n in result['nodes']:
+        if 'error' in n:
+            console.print(f"   ❌ {n['name']}: [red]{n['error']}[/red] ({n['ms']:.0f} ms)")
+            continue
+        console.print(f"   ✅ {n['name']}: v{n['version']}, {n['clients']} clients, [green]{n['proxies']}[/green] proxies, "
+                      f"{n['conns']} conns, ↓{_human_bytes(n['traffic_in'])} ↑{_human_bytes(n['traffic_out'])} ({n['ms']:.0f} ms)")
+    console.print(f"\n   Σ {t['clients']} clients, {t['proxies']} proxies, {t['conns']} conns, "
+                  f"↓{_human_bytes(t['traffic_in'])} ↑{_human_bytes(t['traffic_out'])}\n")
+
+def _fleet_ssh(hosts_file, command, deadline, parallel):
+    from .core.fleet_ops import fleet_command
+    results = fleet_command(_load_hosts(hosts_file), command, deadline, parallel)
+    failed = 0
+    for r in results:
+        if r.get('ok'):
+            console.print(f"   ✅ {r['name']}")
+        else:
+            failed += 1
+            console.print(f"   ❌ {r['name']}: [red]{r.get('error') or r.get('output') or 'failed'}[/red]")
+    console.print(f"\n{'✅' if not failed else '⚠️ '} {len(results) - failed}/{len(results)} hosts ok\n")
+    if failed:
+        sys.exit(1)
+
+@fleet.command('reload')
+@click.argument('hosts_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--deadline', default=30.0, type=click.FloatRange(0, min_open=True), help='Per-host deadline (seconds)')
+@click.option('--parallel', default=16, type=click.IntRange(1), help='Max concurrent hosts')
+def fleet_reload(hosts_file, deadline, parallel):
+    """Run 'ft server reload' on every host over ssh"""
+    _fleet_ssh(hosts_file, 'ft server reload', deadline, parallel)
+
+@fleet.command('stop')
+@click.argument('hosts_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--deadline', default=30.0, type=click.FloatRange(0, min_open=True), help='Per-host deadline (seconds)')
+@click.option('--parallel', default=16, type=click.IntRange(1), help='Max concurrent hosts')
+def fleet_stop(hosts_file, deadline, parallel):
+    """Run 'ft server stop' on every host over ssh"""
+    _fleet_ssh(hosts_file, 'ft server stop', deadline, parallel)
+
 # ─── PASSTHROUGH ───
 
 @cli.command('frps', context_settings={'ignore_unknown_options': True, 'allow_interspersed_args': False})
@@ -450,6 +1343,124 @@ def passthrough_frpc(args):
 
 # ─── UTILS ───
 
+@cli.command('ssh-config')
+@click.option('--source', type=click.Choice(['auto', 'client', 'server']), default='auto', help='Read proxies from frpc.yaml or the frps dashboard')
+@click.option('--host', default=None, help='Server address to connect to (default: from config / public IP)')
+@click.option('--user', default=None, help='SSH user for generated hosts')
+@click.option('--prefix', default='ft-', help='Host alias prefix')
+@click.option('--link', type=click.Choice(['lan', 'wan', 'slow']), default='wan', help='Tune keep-alive/compression for the link')
+@click.option('--persist', default='10m', help='ControlPersist duration')
+@click.option('--all', 'all_proxies', is_flag=True, help='Include non-SSH tcp proxies')
+@click.option('--output', type=click.Path(dir_okay=False, path_type=Path), default=None, help='SSH config file (default: ~/.ssh/config)')
+@click.option('--print', 'print_only', is_flag=True, help='Print the block instead of writing')
+@click.option('--mux-port', default=None, type=int, help='Server tcpmux port (default: per proxy from client init --cluster, or 5002)')
+def ssh_config(source, host, user, prefix, link, persist, all_proxies, output, print_only, mux_port):
+    """Generate multiplexed ~/.ssh/config entries for tunnels"""
+    import yaml
+    from .core.sshconfig import entries_from_client, entries_from_server, render_block, update_config
+    from .core.mux import proxy_command
+    if source == 'auto':
+        source = 'client' if CLIENT_YAML.exists() else 'server'
+    if source == 'client':
+        if not CLIENT_YAML.exists():
+            console.print("❌ No config. Run 'ft client init' first", style="red")
+            return
+        with open(CLIENT_YAML) as f:
+            entries = entries_from_client(yaml.safe_load(f) or {}, all_proxies, mux_port)
+        if host:
+            for e in entries:
+                if e.get('proxy_command'):
+                    e['proxy_command'] = proxy_command(host, e['mux_port'])
+                else:
+                    e['host'] = host
+    else:
+        if not SERVER_YAML.exists():
+            console.print("❌ No config. Run 'ft server init' first", style="red")
+            return
+        import requests
+        from .core.dashboard import server_api, get_proxies
+        from .core.mux import DEFAULT_MUX_PORT
+        with open(SERVER_YAML) as f:
+            cfg = yaml.safe_load(f) or {}
+        base, auth = server_api(cfg)
+        mux_port = mux_port or cfg.get('tcpmuxHTTPConnectPort', DEFAULT_MUX_PORT)
+        try:
+            proxies = get_proxies(base, auth, types=('tcp', 'tcpmux'))
+        except (requests.RequestException, ValueError) as e:
+            console.print(f"❌ Dashboard API unreachable: {e}", style="red")
+            return
+        entries = entries_from_server(proxies, host or get_public_ip(), mux_port)
+    if not entries:
+        console.print("⚠️  No SSH proxies found (use --all for every tcp proxy)")
+        return
+    # Windows OpenSSH has no ControlMaster support
+    block = render_block(entries, prefix, user, link, persist, multiplex=sys.platform != 'win32')
+    if print_only:
+        click.echo(block, nl=False)
+        return
+    path = output or HOME / '.ssh' / 'config'
+    changed = update_config(path, block)
+    console.print(f"{'✅ Updated' if changed else '✅ Up to date'}: {path} ({len(entries)} hosts)")
+    for e in sorted(entries, key=lambda e: e['name'])[:5]:
+        console.print(f"   [yellow]ssh {prefix}{e['name']}[/yellow]")
+
+@cli.command('mux-connect', hidden=True)
+@click.argument('hostname')
+@click.option('--server', required=True, help='frps address')
+@click.option('--port', default=5002, type=int, help='frps tcpmux port')
+def mux_connect(hostname, server, port):
+    """ssh ProxyCommand: connect stdio to HOSTNAME via frps tcpmux"""
+    from .core.mux import open_tunnel, pipe_stdio
+    try:
+        sock = open_tunnel(server, port, hostname)
+    except (OSError, ConnectionError) as e:
+        click.echo(f"mux-connect: {e}", err=True)
+        sys.exit(1)
+    pipe_stdio(sock)
+
+@cli.command('status')
+@click.option('--fast', is_flag=True, help='Answer from the running ft daemon (milliseconds)')
+@click.option('--json', 'as_json', is_flag=True, help='With --fast: print the raw daemon snapshot')
+@click.pass_context
+def status(ctx, fast, as_json):
+    """Show server and client status"""
+    # `ft status --fast` is normally answered in fast.main() before this module loads
+    if fast:
+        from .fast import query, render
+        state = query()
+        if state is not None and 'error' not in state:
+            import json
+            click.echo(json.dumps(state) if as_json else render(state))
+            return
+        console.print("⚠️  ft daemon not running or not answering, falling back to a full status check", style="yellow")
+    if SERVER_YAML.exists() or is_running('frps'):
+        ctx.invoke(server_status)
+    if CLIENT_YAML.exists() or is_running('frpc'):
+        ctx.invoke(client_status)
+
+@cli.command()
+@click.option('--socket', 'socket_file', type=click.Path(dir_okay=False), default=None, help='Socket path (default: FT_SOCKET or ~/data/frp/ft.sock)')
+def daemon(socket_file):
+    """Serve cached status over a Unix socket (for ft status --fast)"""
+    if sys.platform == 'win32':
+        console.print("❌ ft daemon needs Unix domain sockets", style="red")
+        sys.exit(1)
+    import asyncio
+    from .fast import socket_path, query
+    from .core.daemon import StatusCache, StatusDaemon
+    path = Path(socket_file) if socket_file else socket_path()
+    if socket_file:
+        os.environ['FT_SOCKET'] = str(path)
+    if query('ping') is not None:
+        console.print(f"⚠️  ft daemon already listening on {path}")
+        return
+    console.print(f"✅ ft daemon listening on {path} (Ctrl+C to stop)")
+    try:
+        asyncio.run(StatusDaemon(StatusCache(DATA_DIR, get_public_ip), path).serve())
+    except KeyboardInterrupt:
+        console.print()
+    console.print("✅ ft daemon stopped")
+
 @cli.command()
 def token():
     """Generate authentication token"""
@@ -464,7 +1475,10 @@ def stop():
     console.print("✅ All FRP processes stopped")
 
 def main():
-    cli()
+    try:
+        cli()
+    finally:
+        trace.flush()
 
 if __name__ == '__main__':
     main()
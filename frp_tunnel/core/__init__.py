@@ -4,6 +4,7 @@ from .platform import detect_platform, is_colab
 from .installer import install_binaries, get_binary_path, is_installed
 from .config import ConfigManager
 from .tunnel import TunnelManager
+from .async_tunnel import AsyncTunnelManager
 
 __all__ = [
     'detect_platform',
@@ -12,5 +13,6 @@ __all__ = [
     'get_binary_path',
     'is_installed',
     'ConfigManager',
-    'TunnelManager'
+    'TunnelManager',
+    'AsyncTunnelManager'
 ]
@@ -0,0 +1,241 @@
+"""Asyncio tunnel management"""
+
+import asyncio
+import os
+import signal
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .installer import get_binary_path, is_installed, install_binaries
+from .config import ConfigManager
+
+_SIGKILL = getattr(signal, 'SIGKILL', signal.SIGTERM)
+
+
+class AsyncTunnelManager:
+    """Non-blocking counterpart of TunnelManager for event-loop orchestrators
+
+    Processes are keyed by component and optional profile name, so many
+    frpc instances (one config per profile) can be driven from one loop.
+    PID files are shared with TunnelManager.
+    """
+
+    def __init__(self, concurrency: int = 32):
+        self.config_manager = ConfigManager()
+        self.pid_dir = self.config_manager.config_dir / 'pids'
+        self.pid_dir.mkdir(parents=True, exist_ok=True)
+        self.concurrency = concurrency
+        self._procs: Dict[str, asyncio.subprocess.Process] = {}
+
+    # ─── Helpers ───
+
+    def _key(self, component: str, profile: Optional[str] = None) -> str:
+        name = f'frp{component[0]}'
+        return f'{name}-{profile}' if profile else name
+
+    def _pid_file(self, key: str) -> Path:
+        return self.pid_dir / f'{key}.pid'
+
+    def _read_pid(self, key: str) -> Optional[int]:
+        try:
+            return int(self._pid_file(key).read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _pid_alive(self, pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+            return True
+        except (ProcessLookupError, PermissionError, OSError):
+            return False
+
+    def _ready_port(self, component: str, profile: Optional[str]) -> Optional[int]:
+        """Port that accepts connections once the process is ready"""
+        if component == 'server':
+            return self.config_manager.get_server_config().get('bindPort', 7000)
+        return (self.config_manager.get_client_config(profile).get('webServer') or {}).get('port')
+
+    async def _port_open(self, port: int) -> bool:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+        except OSError:
+            return False
+        writer.close()
+        return True
+
+    async def _wait_ready(self, proc: asyncio.subprocess.Process, port: Optional[int],
+                          timeout: float) -> bool:
+        """Poll until the ready port accepts connections or the process exits"""
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            if proc.returncode is not None:
+                return False
+            if port is None or await self._port_open(port):
+                # Without a port to probe, surviving one poll interval is all we can check
+                if port is None:
+                    await asyncio.sleep(delay)
+                return proc.returncode is None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        return False
+
+    async def _gather(self, coros: Iterable) -> List:
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(coro):
+            async with sem:
+                return await coro
+
+        return await asyncio.gather(*(bounded(c) for c in coros))
+
+    # ─── Single process ───
+
+    async def start(self, component: str, config: Optional[Dict] = None,
+                    profile: Optional[str] = None, ready_timeout: float = 10) -> bool:
+        """Start frps/frpc and wait until it accepts connections
+
+        Args:
+            component: 'server' or 'client'
+            config: Options for ConfigManager.create_*_config; None keeps the existing file
+            profile: Client profile name (one frpc per profile)
+            ready_timeout: Seconds to wait for readiness
+        """
+        key = self._key(component, profile)
+        if await self.is_running(component, profile):
+            return True
+        if not is_installed(component):
+            await asyncio.get_running_loop().run_in_executor(None, install_binaries, component)
+
+        if component == 'server':
+            config_path = (self.config_manager.create_server_config(config) if config is not None
+                           else self.config_manager.server_config_path)
+        else:
+            config_path = (self.config_manager.create_client_config(config, profile) if config is not None
+                           else self.config_manager.config_path('client', profile))
+        if not config_path.exists():
+            print(f"Error starting {key}: no config at {config_path}")
+            return False
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                str(get_binary_path(component)), '-c', str(config_path),
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        except OSError as e:
+            print(f"Error starting {key}: {e}")
+            return False
+
+        self._procs[key] = proc
+        self._pid_file(key).write_text(str(proc.pid))
+        if await self._wait_ready(proc, self._ready_port(component, profile), ready_timeout):
+            return True
+        await self.stop(component, profile)
+        return False
+
+    async def stop(self, component: str, profile: Optional[str] = None, grace: float = 2) -> bool:
+        """Stop a process: SIGTERM, then SIGKILL after the grace period"""
+        key = self._key(component, profile)
+        pid_file = self._pid_file(key)
+        proc = self._procs.pop(key, None)
+        pid = proc.pid if proc else self._read_pid(key)
+        if pid is None:
+            return True
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        except OSError as e:
+            print(f"Error stopping {key}: {e}")
+            return False
+
+        if proc:
+            try:
+                await asyncio.wait_for(proc.wait(), grace)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+        else:
+            deadline = time.monotonic() + grace
+            while self._pid_alive(pid) and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            if self._pid_alive(pid):
+                try:
+                    os.kill(pid, _SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+        if pid_file.exists():
+            pid_file.unlink()
+        return True
+
+    async def is_running(self, component: str, profile: Optional[str] = None) -> bool:
+        """Check if the process is alive, removing stale PID files"""
+        key = self._key(component, profile)
+        proc = self._procs.get(key)
+        if proc is not None:
+            return proc.returncode is None
+        pid = self._read_pid(key)
+        if pid is not None and self._pid_alive(pid):
+            return True
+        if self._pid_file(key).exists():
+            self._pid_file(key).unlink()
+        return False
+
+    async def status(self, component: str, profile: Optional[str] = None) -> Dict:
+        """Running state, PID and readiness of one process"""
+        key = self._key(component, profile)
+        running = await self.is_running(component, profile)
+        port = self._ready_port(component, profile) if running else None
+        return {
+            'name': key,
+            'running': running,
+            'pid': self._read_pid(key) if running else None,
+            'ready': running and (port is None or await self._port_open(port)),
+        }
+
+    async def reload(self, component: str, profile: Optional[str] = None) -> bool:
+        """Hot-reload frpc via its admin API; frps has no reload so it restarts"""
+        if component == 'server':
+            await self.stop('server')
+            return await self.start('server')
+        config_path = self.config_manager.config_path('client', profile)
+        proc = await asyncio.create_subprocess_exec(
+            str(get_binary_path('client')), 'reload', '-c', str(config_path),
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            print(f"Error reloading {self._key(component, profile)}: {stderr.decode().strip()}")
+        return proc.returncode == 0
+
+    # ─── Bulk (client profiles) ───
+
+    async def start_many(self, profiles: Dict[str, Optional[Dict]],
+                         ready_timeout: float = 10) -> Dict[str, bool]:
+        """Start many client profiles concurrently; {profile: config or None}"""
+        names = list(profiles)
+        results = await self._gather(
+            self.start('client', profiles[n], n, ready_timeout) for n in names)
+        return dict(zip(names, results))
+
+    async def stop_many(self, profiles: Iterable[str]) -> Dict[str, bool]:
+        """Stop many client profiles concurrently"""
+        names = list(profiles)
+        results = await self._gather(self.stop('client', n) for n in names)
+        return dict(zip(names, results))
+
+    async def status_many(self, profiles: Iterable[str]) -> Dict[str, Dict]:
+        """Status of many client profiles concurrently"""
+        names = list(profiles)
+        results = await self._gather(self.status('client', n) for n in names)
+        return dict(zip(names, results))
+
+    async def reload_many(self, profiles: Iterable[str]) -> Dict[str, bool]:
+        """Hot-reload many client profiles concurrently"""
+        names = list(profiles)
+        results = await self._gather(self.reload('client', n) for n in names)
+        return dict(zip(names, results))
+
+    def profiles(self) -> List[str]:
+        """Client profiles that have a config file"""
+        return sorted(p.stem[len('frpc-'):] for p in self.config_manager.config_dir.glob('frpc-*.yaml'))
@@ -0,0 +1,189 @@
+"""Per-proxy bandwidth limits and a policy-driven limit controller
+
+frpc proxies take `transport.bandwidthLimit` ("512KB", "10MB") and
+`transport.bandwidthLimitMode` (client: frpc enforces, server: frps
+enforces). The policy file assigns proxies to classes; the Shaper reads
+traffic counters from the frps dashboard and tightens bulk limits while
+interactive proxies are active on a busy link, relaxing them afterwards.
+"""
+
+import fnmatch
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+UNITS = {'KB': 1024, 'MB': 1024 * 1024}
+
+DEFAULT_POLICY = {
+    'mode': 'server',
+    # Relay link budget in bytes/s terms; contention starts at highWater of it
+    'capacity': '100MB',
+    'highWater': 0.8,
+    'lowWater': 0.5,
+    'default': 'interactive',
+    'classes': {
+        # 0 = unlimited; interactive proxies are never throttled
+        'interactive': {'min': '0', 'max': '0'},
+        'bulk': {'min': '512KB', 'max': '0'},
+    },
+    'proxies': {},
+    # frps dashboard to read counters from: {url, user, password}
+    'dashboard': None,
+}
+
+
+def parse_rate(text) -> int:
+    """'10MB' / '512KB' / '0' -> bytes per second (0 = unlimited)"""
+    value = str(text).strip().upper()
+    if value in ('0', 'OFF', 'NONE', ''):
+        return 0
+    m = re.fullmatch(r'(\d+)\s*(KB|MB)', value)
+    if not m:
+        raise ValueError(f'invalid rate {text!r} (expected e.g. 512KB or 10MB)')
+    return int(m.group(1)) * UNITS[m.group(2)]
+
+
+def format_rate(rate: int) -> str:
+    """Bytes per second -> frp limit string, rounded down to whole KB/MB"""
+    if rate >= UNITS['MB'] and rate % UNITS['MB'] == 0 or rate >= 10 * UNITS['MB']:
+        return f"{rate // UNITS['MB']}MB"
+    return f"{max(1, rate // UNITS['KB'])}KB"
+
+
+def set_limit(config: Dict[str, Any], name: str, rate: int, mode: str = 'server') -> bool:
+    """Set (rate > 0) or clear (rate 0) a proxy's limit; returns False if no such proxy"""
+    for proxy in config.get('proxies') or []:
+        if proxy.get('name') != name:
+            continue
+        transport = proxy.setdefault('transport', {})
+        if rate:
+            transport['bandwidthLimit'] = format_rate(rate)
+            transport['bandwidthLimitMode'] = mode
+        else:
+            transport.pop('bandwidthLimit', None)
+            transport.pop('bandwidthLimitMode', None)
+        if not transport:
+            del proxy['transport']
+        return True
+    return False
+
+
+def current_limits(config: Dict[str, Any]) -> Dict[str, int]:
+    """Proxy name -> configured limit in bytes/s (0 = unlimited)"""
+    limits = {}
+    for proxy in config.get('proxies') or []:
+        limit = (proxy.get('transport') or {}).get('bandwidthLimit')
+        limits[proxy['name']] = parse_rate(limit) if limit else 0
+    return limits
+
+
+def load_policy(path: Path) -> Dict[str, Any]:
+    """Read a policy file merged over DEFAULT_POLICY, validating rates and classes"""
+    policy = {k: (dict(v) if isinstance(v, dict) else v) for k, v in DEFAULT_POLICY.items()}
+    if path.exists():
+        with open(path) as f:
+            data = yaml.safe_load(f) or {}
+        for key, value in data.items():
+            if isinstance(value, dict) and isinstance(policy.get(key), dict):
+                policy[key].update(value)
+            else:
+                policy[key] = value
+    if policy['mode'] not in ('server', 'client'):
+        raise ValueError(f"mode must be server or client, got {policy['mode']!r}")
+    policy['capacity'] = parse_rate(policy['capacity'])
+    for name, cls in policy['classes'].items():
+        policy['classes'][name] = {'min': parse_rate(cls.get('min', 0)), 'max': parse_rate(cls.get('max', 0))}
+    for pattern, cls in list(policy['proxies'].items()) + [('*', policy['default'])]:
+        if cls not in policy['classes']:
+            raise ValueError(f'{pattern}: unknown class {cls!r}')
+    return policy
+
+
+def classify(policy: Dict[str, Any], name: str) -> str:
+    """Class of a proxy: exact name, then the first matching glob, then default"""
+    patterns = policy['proxies']
+    if name in patterns:
+        return patterns[name]
+    for pattern, cls in patterns.items():
+        if fnmatch.fnmatchcase(name, pattern):
+            return cls
+    return policy['default']
+
+
+class Shaper:
+    """AIMD controller for bulk proxy limits
+
+    Each step() takes the full dashboard proxy list, turns the cumulative
+    traffic counters into rates, and when the link (every proxy on the
+    relay, other clients' included) is above highWater while one of this
+    client's interactive proxies has connections, halves every active
+    limited-class proxy of this client (not below its class min). Below
+    lowWater, or with no interactive sessions, limits grow by half again
+    until they reach the class max (0 = limit removed). frps names a
+    client's proxies "<user>.<name>"; prefix is that "<user>." part.
+    """
+
+    def __init__(self, policy: Dict[str, Any], limits: Dict[str, int], prefix: str = ''):
+        self.policy = policy
+        self.limits = dict(limits)
+        self.prefix = prefix
+        self._last: Dict[str, int] = {}
+        self._last_ts: Optional[float] = None
+
+    def _rates(self, proxies: List[Dict[str, Any]], now: float) -> Dict[str, float]:
+        totals = {p['name']: p.get('todayTrafficIn', 0) + p.get('todayTrafficOut', 0) for p in proxies}
+        rates = {}
+        if self._last_ts is not None and now > self._last_ts:
+            dt = now - self._last_ts
+            for name, total in totals.items():
+                # Counters reset at midnight: treat a drop as a fresh start
+                delta = total - self._last.get(name, total)
+                rates[name] = max(0, delta) / dt
+        self._last, self._last_ts = totals, now
+        return rates
+
+    def step(self, proxies: List[Dict[str, Any]], now: Optional[float] = None) -> Dict[str, Any]:
+        """Update limits from one dashboard sample; returns the decision"""
+        now = time.time() if now is None else now
+        link = self._rates(proxies, now)
+        total = sum(link.values())
+        # Only this client's proxies are classified and limited
+        cut = len(self.prefix)
+        online = {p['name'][cut:]: p for p in proxies if p.get('status') != 'offline'
+                  and p['name'].startswith(self.prefix) and p['name'][cut:] in self.limits}
+        rates = {name: link.get(p['name'], 0) for name, p in online.items()}
+        interactive = [n for n, p in online.items()
+                       if classify(self.policy, n) == 'interactive' and p.get('curConns', 0) > 0]
+        capacity = self.policy['capacity']
+        if interactive and capacity and total > capacity * self.policy['highWater']:
+            action = 'tighten'
+        elif not interactive or not capacity or total < capacity * self.policy['lowWater']:
+            action = 'relax'
+        else:
+            action = 'hold'
+        changes = {}
+        for name in online:
+            cls_name = classify(self.policy, name)
+            cls = self.policy['classes'][cls_name]
+            if cls_name == 'interactive' or cls['min'] == cls['max'] == 0:
+                continue  # never throttled / unmanaged class
+            old = self.limits.get(name, 0)
+            new = old
+            if action == 'tighten' and rates.get(name, 0) > 0:
+                base = old or int(max(rates[name], cls['min']))
+                new = max(cls['min'], base // 2)
+            elif action == 'relax' and old:
+                new = old + old // 2
+                if cls['max'] and new >= cls['max']:
+                    new = cls['max']
+                elif not cls['max'] and capacity and new >= capacity:
+                    new = 0
+            if new:
+                new = parse_rate(format_rate(new))  # what frp will actually enforce
+            if new != old:
+                changes[name] = (old, new)
+                self.limits[name] = new
+        return {'action': action, 'rate': total, 'interactive': interactive, 'changes': changes}
@@ -0,0 +1,195 @@
+"""Sharded frps clusters and consistent-hash shard assignment"""
+
+import bisect
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+# Virtual nodes per shard; smooths the key distribution on small clusters
+REPLICAS = 160
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent-hash ring mapping proxy names to shards
+
+    Adding or removing one of N shards only moves about 1/N of the keys.
+    """
+
+    def __init__(self, nodes: List[str], replicas: int = REPLICAS):
+        self.replicas = replicas
+        self._keys: List[int] = []
+        self._nodes: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        for i in range(self.replicas):
+            h = _hash(f'{node}#{i}')
+            if h not in self._nodes:
+                bisect.insort(self._keys, h)
+            self._nodes[h] = node
+
+    def remove(self, node: str):
+        for i in range(self.replicas):
+            h = _hash(f'{node}#{i}')
+            if self._nodes.get(h) == node:
+                del self._nodes[h]
+                self._keys.pop(bisect.bisect_left(self._keys, h))
+
+    def get(self, key: str) -> str:
+        if not self._keys:
+            raise ValueError('Hash ring is empty')
+        idx = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[self._keys[idx]]
+
+
+def parse_servers(spec: str, default_port: int = 7000) -> List[str]:
+    """Parse 'host1:7000,host2' into ['host1:7000', 'host2:7000']"""
+    servers = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        servers.append(item if ':' in item else f'{item}:{default_port}')
+    return servers
+
+
+def pick_server(servers: List[str], proxy_name: str) -> str:
+    """Deterministically pick the 'host:port' shard for a proxy"""
+    return HashRing(servers).get(proxy_name)
+
+
+def plan_cluster(nodes: Optional[List[str]], shards: int, data_dir: Path,
+                 bind_port: int = 7000, dashboard_port: int = 7500,
+                 node_log_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Lay out shard nodes across hosts and ports
+
+    Without explicit nodes the shards run on this host on consecutive
+    ports; shard 0 keeps the default frps.yaml so single-node commands
+    keep working. With nodes, every host gets `shards` frps instances
+    and its configs are written under data_dir/cluster for copying.
+    Their logs go to node_log_dir on the target host, or to the console
+    (the service journal) since this host's paths mean nothing there.
+    """
+    plan = []
+    if not nodes:
+        for i in range(shards):
+            plan.append({
+                'name': f'shard-{i}',
+                'portOffset': i,
+                'addr': None,
+                'local': True,
+                'bindPort': bind_port + i,
+                'dashboardPort': dashboard_port + i,
+                'config': str(data_dir / ('frps.yaml' if i == 0 else f'frps-{i}.yaml')),
+                'log': str(data_dir / ('frps.log' if i == 0 else f'frps-{i}.log')),
+            })
+        return plan
+    for host in nodes:
+        for i in range(shards):
+            name = f'{host}-{i}'
+            plan.append({
+                'name': name,
+                'portOffset': i,
+                'addr': host,
+                'local': False,
+                'bindPort': bind_port + i,
+                'dashboardPort': dashboard_port + i,
+                'config': str(data_dir / 'cluster' / f'{name}.yaml'),
+                'log': f"{node_log_dir.rstrip('/')}/frps-{i}.log" if node_log_dir else 'console',
+            })
+    return plan
+
+
+def shard_config(node: Dict[str, Any], token: str, extra_ports: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """frps config for one shard; all shards share the token
+
+    extra_ports are additional listener settings (e.g. tcpmuxHTTPConnectPort),
+    shifted by the shard's port offset so shards on one host don't collide;
+    non-port values such as subdomainHost are copied unchanged.
+    """
+    config = {
+        'bindPort': node['bindPort'],
+        'auth': {'token': token},
+        'webServer': {'addr': '0.0.0.0', 'port': node['dashboardPort'], 'user': 'admin', 'password': 'admin'},
+        'log': {'to': node['log'], 'level': 'info'},
+    }
+    config.update(shard_settings(node, extra_ports))
+    return config
+
+
+def shard_settings(node: Dict[str, Any], extra_ports: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """extra_ports as they apply to one shard (ports shifted by its offset)"""
+    return {key: value + node.get('portOffset', 0) if isinstance(value, int) else value
+            for key, value in (extra_ports or {}).items()}
+
+
+def write_cluster(manifest_path: Path, plan: List[Dict[str, Any]], token: str,
+                  extra_ports: Optional[Dict[str, int]] = None) -> List[Path]:
+    """Write every shard config plus the cluster manifest
+
+    The manifest records each shard's extra listener settings too, so a
+    client handed cluster.yaml can find its shard's tcpmux/vhost ports.
+    """
+    written = []
+    for node in plan:
+        node.update(shard_settings(node, extra_ports))
+        path = Path(node['config'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            yaml.dump(shard_config(node, token, extra_ports), f, default_flow_style=False)
+        written.append(path)
+    with open(manifest_path, 'w') as f:
+        yaml.dump({'token': token, 'nodes': plan}, f, default_flow_style=False, sort_keys=False)
+    return written
+
+
+def load_cluster(manifest_path: Path) -> Dict[str, Any]:
+    """Read the cluster manifest, {} if this host has none"""
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def remove_cluster(manifest_path: Path, keep: Optional[Path] = None) -> List[Path]:
+    """Delete the manifest and every shard config it lists except keep"""
+    removed = []
+    for node in load_cluster(manifest_path).get('nodes', []):
+        path = Path(node['config'])
+        if path != keep and path.exists():
+            path.unlink()
+            removed.append(path)
+    if manifest_path.exists():
+        manifest_path.unlink()
+    return removed
+
+
+def node_api(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Dashboard url and credentials of a shard, from its own frps config"""
+    config = {}
+    path = Path(node['config'])
+    if path.exists():
+        with open(path) as f:
+            config = yaml.safe_load(f) or {}
+    web = config.get('webServer') or {}
+    host = '127.0.0.1' if node.get('local') else node['addr']
+    auth = (web['user'], web.get('password', '')) if web.get('user') else None
+    return {'name': node['name'], 'api': f"http://{host}:{web.get('port', node['dashboardPort'])}", 'auth': auth}
+
+
+def pick_node(manifest: Dict[str, Any], public_addr: str, proxy_name: str) -> Dict[str, Any]:
+    """Manifest node a proxy hashes to, same choice as pick_server on server_list"""
+    servers = server_list(manifest, public_addr)
+    return manifest['nodes'][servers.index(pick_server(servers, proxy_name))]
+
+
+def server_list(manifest: Dict[str, Any], public_addr: str) -> List[str]:
+    """Client-facing 'host:port' list of a cluster"""
+    return [f"{n.get('addr') or public_addr}:{n['bindPort']}" for n in manifest.get('nodes', [])]
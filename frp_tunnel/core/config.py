@@ -2,7 +2,7 @@
 
 import secrets
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import yaml
 
 class ConfigManager:
@@ -11,6 +11,12 @@ class ConfigManager:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
         self.server_config_path = self.config_dir / 'frps.yaml'
+        self.client_config_path = self.config_dir / 'frpc.yaml'
+    
+    def config_path(self, component: str, profile: Optional[str] = None) -> Path:
+        """Config path of a component, optionally for a named profile"""
+        name = f"frp{component[0]}"
+        return self.config_dir / (f"{name}-{profile}.yaml" if profile else f"{name}.yaml")
     
     def create_server_config(self, config: Dict[str, Any]) -> Path:
         """Create server configuration file in YAML format"""
@@ -46,6 +52,64 @@ class ConfigManager:
         
         return self.server_config_path
     
+    def create_client_config(self, config: Dict[str, Any], profile: Optional[str] = None) -> Path:
+        """Create client configuration file in YAML format
+        
+        Recognized keys: server_addr, server_port, token, admin_port and
+        either proxies (frp-style proxy dicts) or port/local_port for a
+        single SSH proxy. Values missing from config are kept from an
+        existing file.
+        """
+        config_path = self.config_path('client', profile)
+        existing_config = {}
+        if config_path.exists():
+            with open(config_path) as f:
+                existing_config = yaml.safe_load(f) or {}
+        
+        log_name = f"frpc-{profile}.log" if profile else 'frpc.log'
+        admin_port = (config.get('admin_port')
+                      or existing_config.get('webServer', {}).get('port')
+                      or (self._free_port() if profile else 7400))
+        proxies = config.get('proxies')
+        if proxies is None and config.get('port'):
+            port = config['port']
+            proxies = [{
+                'name': f"ssh_{port}",
+                'type': 'tcp',
+                'localIP': '127.0.0.1',
+                'localPort': config.get('local_port', 22),
+                'remotePort': port
+            }]
+        if proxies is None:
+            proxies = existing_config.get('proxies', [])
+        
+        yaml_config = {
+            'serverAddr': config.get('server_addr', existing_config.get('serverAddr', '127.0.0.1')),
+            'serverPort': config.get('server_port', existing_config.get('serverPort', 7000)),
+            'auth': {'token': config.get('token') or existing_config.get('auth', {}).get('token', '')},
+            'log': {
+                'to': str(self.config_dir / log_name),
+                'level': 'info',
+                'maxDays': 3
+            },
+            'webServer': {'addr': '127.0.0.1', 'port': admin_port},
+            'proxies': proxies
+        }
+        
+        with open(config_path, 'w') as f:
+            yaml.dump(yaml_config, f, default_flow_style=False)
+        
+        return config_path
+    
+    def get_client_config(self, profile: Optional[str] = None) -> Dict[str, Any]:
+        """Read client configuration"""
+        config_path = self.config_path('client', profile)
+        if not config_path.exists():
+            return {}
+        
+        with open(config_path) as f:
+            return yaml.safe_load(f) or {}
+    
     def get_server_config(self) -> Dict[str, Any]:
         """Read server configuration"""
         if not self.server_config_path.exists():
@@ -58,6 +122,13 @@ class ConfigManager:
         """Generate a secure token"""
         return f"frp_{secrets.token_hex(16)}"
     
+    def _free_port(self) -> int:
+        """Pick a free local TCP port"""
+        import socket
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+    
     def get_log_path(self, component: str) -> Path:
         """Get log file path"""
         return self.config_dir / f"frp{component[0]}.log"
@@ -0,0 +1,203 @@
+"""Status cache daemon served over a Unix socket
+
+Keeps config, process, API and public IP state warm so local pollers can
+read it with one socket round trip. Protocol: the client sends one JSON
+line ({"cmd": "status" | "ping" | "refresh"}) and reads one JSON line back.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import psutil
+import requests
+import yaml
+
+from .dashboard import server_api, client_api, get_json, get_proxies
+
+# Refresh cadence (seconds) per kind of state
+CONFIG_INTERVAL = 1
+PROCESS_INTERVAL = 2
+API_INTERVAL = 5
+IP_INTERVAL = 600
+
+
+class StatusCache:
+    """In-memory snapshot of server/client state, refreshed in the background"""
+
+    def __init__(self, data_dir: Path, public_ip: Callable[[], str]):
+        self.data_dir = data_dir
+        self.paths = {'server': data_dir / 'frps.yaml', 'client': data_dir / 'frpc.yaml'}
+        self.public_ip = public_ip
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self.state: Dict[str, Any] = {
+            'server': {'config': {}, 'pids': [], 'proxies': None},
+            'client': {'config': {}, 'pids': [], 'proxies': None},
+            'public_ip': None,
+            'updated': {},
+            'started': time.time(),
+        }
+
+    def refresh_configs(self) -> bool:
+        """Reload configs whose mtime changed; returns True if any did"""
+        changed = False
+        for component, path in self.paths.items():
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                mtime = None
+            if self._mtimes.get(component, 0) == mtime:
+                continue
+            self._mtimes[component] = mtime
+            config = {}
+            if mtime is not None:
+                try:
+                    with open(path) as f:
+                        config = yaml.safe_load(f) or {}
+                except (OSError, yaml.YAMLError):
+                    config = {}
+            self.state[component]['config'] = config
+            changed = True
+        self.state['updated']['config'] = time.time()
+        return changed
+
+    def refresh_processes(self):
+        pids = {'frps': [], 'frpc': []}
+        for p in psutil.process_iter(['name']):
+            name = (p.info['name'] or '').replace('.exe', '')
+            if name in pids:
+                pids[name].append(p.pid)
+        self.state['server']['pids'] = pids['frps']
+        self.state['client']['pids'] = pids['frpc']
+        self.state['updated']['process'] = time.time()
+
+    def refresh_apis(self):
+        server, client = self.state['server'], self.state['client']
+        server['proxies'] = client['proxies'] = None
+        if server['pids']:
+            try:
+                base, auth = server_api(server['config'])
+                server['proxies'] = [
+                    {'name': p.get('name'), 'remotePort': (p.get('conf') or {}).get('remotePort'),
+                     'conns': p.get('curConns', 0), 'status': p.get('status')}
+                    for p in get_proxies(base, auth)]
+            except (requests.RequestException, ValueError):
+                pass
+        if client['pids'] and client['config'].get('webServer'):
+            try:
+                base, auth = client_api(client['config'])
+                client['proxies'] = [
+                    {'name': p.get('name'), 'type': p.get('type', t), 'status': p.get('status'), 'err': p.get('err', '')}
+                    for t, items in (get_json(base, '/api/status', auth) or {}).items() for p in items or []]
+            except (requests.RequestException, ValueError):
+                pass
+        self.state['updated']['api'] = time.time()
+
+    def refresh_ip(self):
+        ip = self.public_ip()
+        if ip != 'unknown' or self.state['public_ip'] is None:
+            self.state['public_ip'] = ip
+        self.state['updated']['ip'] = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State with configs reduced to what status displays"""
+        def summary(component):
+            s = self.state[component]
+            cfg = s['config']
+            out = {'running': bool(s['pids']), 'pids': s['pids'], 'proxies': s['proxies'],
+                   'config': str(self.paths[component]) if cfg else None}
+            if component == 'server':
+                out['bindPort'] = cfg.get('bindPort')
+            else:
+                out['server'] = f"{cfg.get('serverAddr', '?')}:{cfg.get('serverPort', 7000)}" if cfg else None
+                out['ports'] = [p.get('remotePort') or ','.join(list(p.get('customDomains') or [])
+                                                                + ([p['subdomain'] + '.*'] if p.get('subdomain') else [])) or None
+                                for p in cfg.get('proxies') or []]
+            return out
+        return {'server': summary('server'), 'client': summary('client'),
+                'public_ip': self.state['public_ip'], 'updated': self.state['updated'],
+                'uptime': round(time.time() - self.state['started'], 1)}
+
+
+class StatusDaemon:
+    """asyncio Unix-socket server answering from a StatusCache"""
+
+    def __init__(self, cache: StatusCache, socket_path: Path):
+        self.cache = cache
+        self.socket_path = socket_path
+
+    async def _run_blocking(self, func):
+        return await asyncio.get_running_loop().run_in_executor(None, func)
+
+    async def _every(self, interval: float, func):
+        while True:
+            try:
+                await self._run_blocking(func)
+            except Exception:
+                # A failed refresh keeps serving the previous snapshot
+                pass
+            await asyncio.sleep(interval)
+
+    async def _watch_configs(self):
+        while True:
+            if await self._run_blocking(self.cache.refresh_configs):
+                # Config changed: refresh API state now instead of on schedule
+                await self._run_blocking(self.cache.refresh_apis)
+            await asyncio.sleep(CONFIG_INTERVAL)
+
+    async def _handle(self, reader, writer):
+        try:
+            line = await asyncio.wait_for(reader.readline(), 5)
+            request = json.loads(line or b'{}')
+            cmd = request.get('cmd', 'status')
+            if cmd == 'ping':
+                reply = {'ok': True}
+            elif cmd == 'refresh':
+                await self._run_blocking(self.cache.refresh_configs)
+                await self._run_blocking(self.cache.refresh_processes)
+                await self._run_blocking(self.cache.refresh_apis)
+                reply = self.cache.snapshot()
+            elif cmd == 'status':
+                reply = self.cache.snapshot()
+            else:
+                reply = {'error': f'unknown command: {cmd}'}
+        except (ValueError, asyncio.TimeoutError) as e:
+            reply = {'error': str(e) or 'bad request'}
+        writer.write(json.dumps(reply, separators=(',', ':')).encode() + b'\n')
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self):
+        self.cache.refresh_configs()
+        self.cache.refresh_processes()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        tasks = [
+            asyncio.ensure_future(self._watch_configs()),
+            asyncio.ensure_future(self._every(PROCESS_INTERVAL, self.cache.refresh_processes)),
+            asyncio.ensure_future(self._every(API_INTERVAL, self.cache.refresh_apis)),
+            asyncio.ensure_future(self._every(IP_INTERVAL, self.cache.refresh_ip)),
+        ]
+        # systemd/kill send SIGTERM: stop cleanly so the socket is removed
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGHUP):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            for sig in (signal.SIGTERM, signal.SIGHUP):
+                loop.remove_signal_handler(sig)
+            for task in tasks:
+                task.cancel()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
@@ -0,0 +1,69 @@
+"""frps dashboard / frpc admin API helpers"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+
+def server_api(config: Dict[str, Any], host: Optional[str] = None) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """Return (base_url, auth) of the dashboard described by an frps config"""
+    web = config.get('webServer') or {}
+    addr = host or web.get('addr', '127.0.0.1')
+    if addr in ('0.0.0.0', '::', ''):
+        addr = '127.0.0.1'
+    auth = (web['user'], web.get('password', '')) if web.get('user') else None
+    return f"http://{addr}:{web.get('port', 7500)}", auth
+
+
+def client_api(config: Dict[str, Any]) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """Return (base_url, auth) of the admin API described by an frpc config"""
+    return server_api(config)
+
+
+def get_json(base: str, path: str, auth=None, timeout: float = 2) -> Any:
+    """GET a JSON document from the API, raising requests.RequestException on failure"""
+    resp = requests.get(base + path, auth=auth, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def get_proxies(base: str, auth=None, types=('tcp',), timeout: float = 2) -> List[Dict[str, Any]]:
+    """List proxies of the given types from an frps dashboard"""
+    proxies = []
+    for ptype in types:
+        proxies.extend(get_json(base, f'/api/proxy/{ptype}', auth, timeout).get('proxies') or [])
+    return proxies
+
+
+def group_proxies(proxies: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Online proxies keyed by their loadBalancer.group"""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for p in proxies:
+        group = ((p.get('conf') or {}).get('loadBalancer') or {}).get('group')
+        if group and p.get('status') != 'offline':
+            groups.setdefault(group, []).append(p)
+    return groups
+
+
+def query_nodes(nodes: List[Dict[str, Any]], types=('tcp',), timeout: float = 3,
+                workers: int = 16) -> List[Dict[str, Any]]:
+    """Query serverinfo and proxies of many dashboards concurrently
+
+    Each node needs 'name', 'api' (base url) and optionally 'auth'.
+    Returns one result dict per node, in input order, with either
+    'info' + 'proxies' or 'error'.
+    """
+    def one(node):
+        result = {'name': node['name'], 'api': node['api']}
+        try:
+            result['info'] = get_json(node['api'], '/api/serverinfo', node.get('auth'), timeout)
+            result['proxies'] = get_proxies(node['api'], node.get('auth'), types, timeout)
+        except (requests.RequestException, ValueError) as e:
+            result['error'] = str(e)
+        return result
+
+    if not nodes:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(nodes))) as pool:
+        return list(pool.map(one, nodes))
@@ -0,0 +1,120 @@
+"""Proxy health checks and failover to standby local targets
+
+frp's own `healthCheck` takes a proxy offline when its local service stops
+answering, so clients are refused instead of black-holed. The Failover
+monitor goes one step further: it probes the active local target itself
+and, after `maxFailed` consecutive failures, rewrites the proxy to the
+first healthy standby so a hot reload restores service.
+"""
+
+import http.client
+import json
+import socket
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Target = Tuple[str, int]
+
+
+def health_check(kind: str = 'tcp', interval: int = 10, max_failed: int = 3,
+                 timeout: int = 3, path: str = '/') -> Dict[str, Any]:
+    """frpc `healthCheck` block"""
+    check = {'type': kind, 'timeoutSeconds': timeout, 'maxFailed': max_failed, 'intervalSeconds': interval}
+    if kind == 'http':
+        check['path'] = path
+    return check
+
+
+def parse_target(text: str) -> Target:
+    """'host:port' or 'port' -> (host, port)"""
+    host, _, port = text.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f'invalid target {text!r} (expected HOST:PORT or PORT)')
+    return host or '127.0.0.1', int(port)
+
+
+def find_proxy(config: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+    for proxy in config.get('proxies') or []:
+        if proxy.get('name') == name:
+            return proxy
+    return None
+
+
+def set_target(proxy: Dict[str, Any], target: Target):
+    proxy['localIP'], proxy['localPort'] = target
+
+
+def probe(target: Target, kind: str = 'tcp', timeout: float = 1.0, path: str = '/') -> bool:
+    """True if the local target answers: TCP connect, or an HTTP 2xx on path"""
+    host, port = target
+    try:
+        if kind == 'http':
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+            try:
+                conn.request('GET', path)
+                return 200 <= conn.getresponse().status < 300
+            finally:
+                conn.close()
+        with socket.create_connection(target, timeout=timeout):
+            return True
+    except (OSError, http.client.HTTPException):
+        return False
+
+
+class SwitchLog:
+    """Append-only JSON lines record of failover switches"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def append(self, event: Dict[str, Any]):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(event) + '\n')
+
+
+class Failover:
+    """Consecutive-failure counter choosing the active target of one proxy
+
+    targets[0] is the primary. When the active target fails max_failed
+    probes in a row, the first other target that passes a probe becomes
+    active. With failback, a healthy primary is restored as soon as it
+    passes max_failed probes in a row again.
+    """
+
+    def __init__(self, name: str, targets: List[Target], active: Target, max_failed: int = 3,
+                 failback: bool = False, check: Callable[[Target], bool] = probe):
+        self.name = name
+        self.targets = targets
+        self.active = active
+        self.max_failed = max_failed
+        self.failback = failback
+        self.check = check
+        self.failures = 0
+        self.primary_ok = 0
+
+    def step(self) -> Optional[Dict[str, Any]]:
+        """Probe once; returns a switch event when the active target changes"""
+        primary = self.targets[0]
+        if self.check(self.active):
+            self.failures = 0
+            if self.failback and self.active != primary:
+                self.primary_ok = self.primary_ok + 1 if self.check(primary) else 0
+                if self.primary_ok >= self.max_failed:
+                    return self._switch(primary, 'failback')
+            return None
+        self.failures += 1
+        if self.failures < self.max_failed:
+            return None
+        for target in self.targets:
+            if target != self.active and self.check(target):
+                return self._switch(target, f'{self.failures} failed probes')
+        return None
+
+    def _switch(self, target: Target, reason: str) -> Dict[str, Any]:
+        event = {'ts': time.time(), 'proxy': self.name, 'from': '%s:%d' % self.active,
+                 'to': '%s:%d' % target, 'reason': reason}
+        self.active = target
+        self.failures = self.primary_ok = 0
+        return event
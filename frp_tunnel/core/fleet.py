@@ -0,0 +1,286 @@
+"""Fleet config rendering from an inventory"""
+
+import hashlib
+import hmac
+import json
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:  # pragma: no cover - libyaml not available
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
+STATE_FILE = '.fleet-state.json'
+DEFAULT_PORT_RANGE = (10000, 30000)
+DEFAULT_PLUGIN_ADDR = '127.0.0.1:9001'
+
+
+def derive_key(secret: str, label: str) -> str:
+    """HMAC-SHA256 derivation of a per-host (or shared) key from the master secret"""
+    return hmac.new(secret.encode(), label.encode(), hashlib.sha256).hexdigest()
+
+
+def auth_token(secret: str) -> str:
+    """Shared frps auth token; derived so the master secret never lands on hosts"""
+    return 'frp_' + derive_key(secret, 'frps-auth')[:32]
+
+
+def load_inventory(path: Path) -> Dict[str, Any]:
+    """Read an inventory file
+
+    Format:
+        server: {addr, port, secret, portRange: [start, end], pluginAddr}
+        defaults: {localIP, localPort, ...proxy keys}
+        hosts:
+          - name: worker-1
+            remotePort: 10022          # optional, pinned
+            proxies: [{name, localPort, remotePort?}, ...]   # optional
+            revoked: true              # optional, login plugin rejects it
+    The master secret may come from FT_FLEET_SECRET instead of the file.
+    """
+    with open(path) as f:
+        inventory = yaml.load(f, Loader=_Loader) or {}
+    server = inventory.setdefault('server', {})
+    server.setdefault('secret', os.getenv('FT_FLEET_SECRET'))
+    if not server.get('secret'):
+        raise ValueError('No master secret: set server.secret or FT_FLEET_SECRET')
+    if not server.get('addr'):
+        raise ValueError('No server.addr in inventory')
+    names = [h.get('name') for h in inventory.get('hosts') or []]
+    if not all(names):
+        raise ValueError('Every host needs a name')
+    if len(set(names)) != len(names):
+        raise ValueError('Duplicate host names in inventory')
+    return inventory
+
+
+def _host_proxies(host: Dict[str, Any], defaults: Dict[str, Any]) -> List[Dict[str, Any]]:
+    proxies = host.get('proxies') or [{'name': 'ssh', 'localPort': defaults.get('localPort', 22),
+                                       'remotePort': host.get('remotePort')}]
+    result = []
+    for p in proxies:
+        proxy = {'type': 'tcp', 'localIP': defaults.get('localIP', '127.0.0.1')}
+        proxy.update({k: v for k, v in defaults.items() if k not in ('localIP', 'localPort')})
+        proxy.update({k: v for k, v in p.items() if v is not None})
+        # Fleet-wide key; frps itself prefixes the name with the client's user
+        proxy['name'] = f"{host['name']}.{p['name']}"
+        proxy.setdefault('localPort', defaults.get('localPort', 22))
+        result.append(proxy)
+    return result
+
+
+def assign_ports(proxies: List[Dict[str, Any]], previous: Dict[str, int],
+                 port_range: Tuple[int, int], reserved=()) -> Dict[str, int]:
+    """Collision-free remote ports keyed by proxy name
+
+    Pinned ports win, then previous assignments are kept so existing
+    hosts never move; new proxies hash into the range and probe linearly,
+    skipping reserved ports.
+    """
+    start, end = port_range
+    size = end - start + 1
+    assigned: Dict[str, int] = {}
+    used = set(reserved)
+    for p in proxies:
+        if p.get('remotePort'):
+            if p['remotePort'] in assigned.values():
+                raise ValueError(f"Port {p['remotePort']} pinned twice ({p['name']})")
+            assigned[p['name']] = p['remotePort']
+            used.add(p['remotePort'])
+    for p in proxies:
+        port = previous.get(p['name'])
+        if p['name'] not in assigned and port and start <= port <= end and port not in used:
+            assigned[p['name']] = port
+            used.add(port)
+    for p in proxies:
+        if p['name'] in assigned:
+            continue
+        if len(used) >= size:
+            raise ValueError(f'Port range {start}-{end} exhausted')
+        offset = zlib.crc32(p['name'].encode()) % size
+        while start + offset in used:
+            offset = (offset + 1) % size
+        assigned[p['name']] = start + offset
+        used.add(start + offset)
+    return assigned
+
+
+def port_ranges(ports) -> List[Dict[str, int]]:
+    """Compress ports into frps allowPorts entries"""
+    entries = []
+    for port in sorted(set(ports)):
+        if entries and entries[-1].get('end', entries[-1].get('single')) == port - 1:
+            last = entries[-1]
+            entries[-1] = {'start': last.get('start', last.get('single')), 'end': port}
+        else:
+            entries.append({'single': port})
+    return entries
+
+
+def _render_client(host: Dict[str, Any], proxies: List[Dict[str, Any]], server: Dict[str, Any]) -> str:
+    prefix = len(host['name']) + 1
+    proxies = [dict(p, name=p['name'][prefix:]) for p in proxies]
+    config = {
+        'serverAddr': server['addr'],
+        'serverPort': server.get('port', 7000),
+        'user': host['name'],
+        'auth': {'token': auth_token(server['secret'])},
+        'metadatas': {'fleetKey': derive_key(server['secret'], host['name'])},
+        'log': {'to': host.get('log', '/var/log/frpc.log'), 'level': 'info', 'maxDays': 3},
+        'webServer': {'addr': '127.0.0.1', 'port': host.get('adminPort', 7400)},
+        'proxies': proxies,
+    }
+    return yaml.dump(config, Dumper=_Dumper, default_flow_style=False, sort_keys=False)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def render_fleet(inventory: Dict[str, Any], out_dir: Path, workers: int = 8,
+                 prune: bool = False) -> Iterator[Tuple[str, str]]:
+    """Render per-host frpc configs plus the server allowPorts file
+
+    Yields (host, action) as each host finishes, action being 'written',
+    'unchanged' or 'pruned'. Hosts whose rendered config matches the
+    digest recorded in the state file are not rewritten.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state_path = out_dir / STATE_FILE
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    server = inventory['server']
+    defaults = inventory.get('defaults') or {}
+    hosts = inventory.get('hosts') or []
+    port_range = tuple(server.get('portRange') or DEFAULT_PORT_RANGE)
+
+    per_host = [(h, _host_proxies(h, defaults)) for h in hosts]
+    all_proxies = [p for _, proxies in per_host for p in proxies]
+    previous = state.get('ports', {})
+    current = {p['name'] for p in all_proxies}
+    # Until pruned, ports of removed hosts stay reserved so they can come back
+    stale = {} if prune else {k: v for k, v in previous.items() if k not in current}
+    ports = assign_ports(all_proxies, previous, port_range, set(stale.values()))
+    digests = state.get('digests', {})
+
+    def render(item):
+        host, proxies = item
+        for p in proxies:
+            p['remotePort'] = ports[p['name']]
+        text = _render_client(host, proxies, server)
+        digest = _digest(text)
+        path = out_dir / f"{host['name']}.frpc.yaml"
+        if digests.get(host['name']) == digest and path.exists():
+            return host['name'], digest, 'unchanged'
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(text)
+        os.replace(tmp, path)
+        return host['name'], digest, 'written'
+
+    new_digests = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for name, digest, action in pool.map(render, per_host):
+            new_digests[name] = digest
+            yield name, action
+
+    names = set(new_digests)
+    for name in sorted(set(digests) - names):
+        if prune:
+            path = out_dir / f'{name}.frpc.yaml'
+            if path.exists():
+                path.unlink()
+            yield name, 'pruned'
+        else:
+            new_digests[name] = digests[name]
+
+    allow = yaml.dump({'allowPorts': port_ranges(ports.values())}, Dumper=_Dumper,
+                      default_flow_style=False)
+    allow_path = out_dir / 'frps-allowports.yaml'
+    if not allow_path.exists() or allow_path.read_text() != allow:
+        allow_path.write_text(allow)
+
+    plugins = yaml.dump({'httpPlugins': [login_plugin(server)]}, Dumper=_Dumper,
+                        default_flow_style=False, sort_keys=False)
+    (out_dir / 'frps-plugins.yaml').write_text(plugins)
+
+    state_path.write_text(json.dumps({'ports': dict(ports, **stale), 'digests': new_digests}, sort_keys=True))
+
+
+def login_plugin(server: Dict[str, Any]) -> Dict[str, Any]:
+    """frps httpPlugins entry pointing Login at `ft fleet auth`"""
+    return {'name': 'fleet-auth', 'addr': server.get('pluginAddr', DEFAULT_PLUGIN_ADDR),
+            'path': '/handler', 'ops': ['Login']}
+
+
+def check_login(inventory: Dict[str, Any], content: Dict[str, Any]) -> Optional[str]:
+    """Reason to reject an frps Login plugin request, None to accept
+
+    The shared auth.token only proves membership of the fleet; the
+    per-host fleetKey in the client's metadatas proves which host it is,
+    so one host can be revoked without rotating the others.
+    """
+    user = content.get('user') or ''
+    host = next((h for h in inventory.get('hosts') or [] if h.get('name') == user), None)
+    if host is None:
+        return f'unknown host {user!r}'
+    if host.get('revoked'):
+        return f'host {user!r} is revoked'
+    key = str((content.get('metas') or {}).get('fleetKey', ''))
+    if not hmac.compare_digest(key, derive_key(inventory['server']['secret'], user)):
+        return f'bad fleetKey for {user!r}'
+    return None
+
+
+def serve_login_plugin(inventory_path: Path, addr: str, port: int,
+                       on_decision: Optional[Callable[[str, Optional[str]], None]] = None):
+    """Serve the frps Login plugin, re-reading the inventory when it changes"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    cache = {'mtime': None, 'inventory': None}
+    lock = threading.Lock()
+
+    def inventory():
+        with lock:
+            mtime = inventory_path.stat().st_mtime
+            if mtime != cache['mtime']:
+                cache['inventory'], cache['mtime'] = load_inventory(inventory_path), mtime
+            return cache['inventory']
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                content = request.get('content') or {}
+                reason = check_login(inventory(), content) if request.get('op') == 'Login' else None
+            except (ValueError, OSError) as e:
+                content, reason = {}, f'plugin error: {e}'
+            if on_decision:
+                on_decision(content.get('user') or '?', reason)
+            reply = {'reject': True, 'reject_reason': reason} if reason else {'reject': False, 'unchange': True}
+            body = json.dumps(reply).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def server_token(inventory: Dict[str, Any]) -> Optional[str]:
+    """frps auth.token matching the rendered clients"""
+    secret = (inventory.get('server') or {}).get('secret')
+    return auth_token(secret) if secret else None
@@ -0,0 +1,131 @@
+"""Concurrent status and control across many frps servers"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+import requests
+
+from .dashboard import get_json
+
+
+def load_hosts(path: Path) -> List[Dict[str, Any]]:
+    """Read a hosts file
+
+    One server per line: `host[:port] [key=value ...]` with keys name,
+    user, password (dashboard credentials, default admin/admin) and ssh
+    (ssh destination for reload/stop, default the host). Blank lines and
+    `#` comments are ignored.
+    """
+    hosts = []
+    for lineno, line in enumerate(path.read_text().splitlines(), 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        addr, *pairs = line.split()
+        host, _, port = addr.rpartition(':') if addr.count(':') == 1 else (addr, '', '')
+        opts = {}
+        for pair in pairs:
+            key, sep, value = pair.partition('=')
+            if not sep:
+                raise ValueError(f'{path}:{lineno}: expected key=value, got {pair!r}')
+            opts[key] = value
+        hosts.append({
+            'name': opts.get('name', host or addr),
+            'host': host or addr,
+            'port': int(port) if port else 7500,
+            'auth': (opts.get('user', 'admin'), opts.get('password', 'admin')),
+            'ssh': opts.get('ssh', host or addr),
+        })
+    return hosts
+
+
+async def _status_one(host: Dict[str, Any], deadline: float, executor: Executor) -> Dict[str, Any]:
+    result = {'name': host['name'], 'host': host['host'], 'port': host['port']}
+    base = f"http://{host['host']}:{host['port']}"
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        # Blocking dashboard helpers in threads; requests' own timeout ends
+        # the thread soon after wait_for gives up on a slow host
+        info, proxies = await asyncio.wait_for(asyncio.gather(
+            loop.run_in_executor(executor, get_json, base, '/api/serverinfo', host['auth'], deadline),
+            loop.run_in_executor(executor, get_json, base, '/api/proxy/tcp', host['auth'], deadline),
+        ), deadline)
+    except asyncio.TimeoutError:
+        result['error'] = 'timeout'
+    except (requests.RequestException, ValueError) as e:
+        result['error'] = str(e) or type(e).__name__
+    else:
+        online = [p for p in proxies.get('proxies') or [] if p.get('status') != 'offline']
+        result.update({
+            'version': info.get('version'),
+            'clients': info.get('clientCounts', 0),
+            'proxies': len(online),
+            'conns': info.get('curConns', sum(p.get('curConns', 0) for p in online)),
+            'traffic_in': info.get('totalTrafficIn', 0),
+            'traffic_out': info.get('totalTrafficOut', 0),
+            'proxy_list': online,
+        })
+    result['ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+async def _bounded(coros, parallel: int) -> List[Any]:
+    sem = asyncio.Semaphore(max(1, parallel))  # 0 would never let a task start
+
+    async def run(coro):
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+def fleet_status(hosts: List[Dict[str, Any]], deadline: float = 3,
+                 parallel: int = 64) -> Dict[str, Any]:
+    """Query every host's dashboard concurrently and aggregate
+
+    Slow hosts are cut off at `deadline` seconds each, so the whole
+    check takes about one round trip plus the slowest allowed host.
+    """
+    # Two requests per host, at most `parallel` hosts at a time
+    executor = ThreadPoolExecutor(max_workers=2 * max(1, min(parallel, len(hosts))))
+    try:
+        nodes = asyncio.run(_bounded((_status_one(h, deadline, executor) for h in hosts), parallel))
+    finally:
+        # Don't wait for threads of hosts that already hit the deadline
+        executor.shutdown(wait=False)
+    up = [n for n in nodes if 'error' not in n]
+    totals = {key: sum(n[key] for n in up) for key in ('clients', 'proxies', 'conns', 'traffic_in', 'traffic_out')}
+    totals.update({'hosts': len(nodes), 'up': len(up)})
+    return {'nodes': nodes, 'totals': totals}
+
+
+async def _ssh_one(host: Dict[str, Any], command: str, deadline: float) -> Dict[str, Any]:
+    result = {'name': host['name']}
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            'ssh', '-o', 'BatchMode=yes', '-o', f'ConnectTimeout={max(1, int(deadline))}',
+            host['ssh'], command,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    except OSError as e:
+        result['error'] = str(e)
+        return result
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), deadline)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        result['error'] = 'timeout'
+        return result
+    result['ok'] = proc.returncode == 0
+    result['output'] = (stdout if proc.returncode == 0 else stderr).decode(errors='replace').strip()
+    return result
+
+
+def fleet_command(hosts: List[Dict[str, Any]], command: str, deadline: float = 30,
+                  parallel: int = 16) -> List[Dict[str, Any]]:
+    """Run an ft command on every host over ssh, bounded and with per-host deadlines"""
+    return asyncio.run(_bounded((_ssh_one(h, command, deadline) for h in hosts), parallel))
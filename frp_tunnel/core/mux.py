@@ -0,0 +1,84 @@
+"""tcpmux (HTTP CONNECT) helpers: many SSH tunnels on one server port"""
+
+import socket
+import sys
+import threading
+from typing import Any, Dict
+
+DEFAULT_MUX_PORT = 5002
+
+
+def mux_proxy(hostname: str, local_port: int = 22) -> Dict[str, Any]:
+    """frpc tcpmux proxy routed by hostname instead of a remotePort"""
+    return {
+        'name': f'ssh_{hostname}',
+        'type': 'tcpmux',
+        'multiplexer': 'httpconnect',
+        'customDomains': [hostname],
+        'localIP': '127.0.0.1',
+        'localPort': local_port,
+    }
+
+
+def proxy_command(server: str, mux_port: int = DEFAULT_MUX_PORT) -> str:
+    """ssh ProxyCommand that tunnels through the frps tcpmux port"""
+    return f'ft mux-connect %h --server {server} --port {mux_port}'
+
+
+def open_tunnel(server: str, mux_port: int, hostname: str, timeout: float = 10) -> socket.socket:
+    """CONNECT to hostname through frps tcpmux; returns the connected socket"""
+    sock = socket.create_connection((server, mux_port), timeout=timeout)
+    sock.sendall(f'CONNECT {hostname}:22 HTTP/1.1\r\nHost: {hostname}:22\r\n\r\n'.encode())
+    header = b''
+    while b'\r\n\r\n' not in header:
+        chunk = sock.recv(4096)
+        if not chunk:
+            sock.close()
+            raise ConnectionError(f'tcpmux closed the connection for {hostname}')
+        header += chunk
+        if len(header) > 65536:
+            sock.close()
+            raise ConnectionError('Oversized CONNECT response')
+    head, _, rest = header.partition(b'\r\n\r\n')
+    status_line = head.split(b'\r\n', 1)[0]
+    status = status_line.split()
+    if len(status) < 2 or status[1] != b'200':
+        sock.close()
+        raise ConnectionError(f"tcpmux refused {hostname}: {status_line.decode(errors='replace')}")
+    sock.settimeout(None)
+    if rest:
+        sys.stdout.buffer.write(rest)
+        sys.stdout.buffer.flush()
+    return sock
+
+
+def pipe_stdio(sock: socket.socket):
+    """Relay stdin -> socket and socket -> stdout until either side closes"""
+    def upstream():
+        stdin = sys.stdin.buffer
+        try:
+            while True:
+                data = stdin.read1(65536) if hasattr(stdin, 'read1') else stdin.read(65536)
+                if not data:
+                    break
+                sock.sendall(data)
+        except OSError:
+            pass
+        try:
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    threading.Thread(target=upstream, daemon=True).start()
+    stdout = sys.stdout.buffer
+    try:
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            stdout.write(data)
+            stdout.flush()
+    except OSError:
+        pass
+    finally:
+        sock.close()
@@ -0,0 +1,89 @@
+"""P2P (xtcp) proxies and visitors with stcp relay fallback"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Give NAT traversal this long before the visitor falls back to the relay
+FALLBACK_TIMEOUT_MS = 1000
+
+
+def relay_name(name: str) -> str:
+    return f'{name}_relay'
+
+
+def p2p_proxies(name: str, secret: str, local_port: int = 22) -> List[Dict[str, Any]]:
+    """xtcp proxy plus an stcp twin on the relay for visitors to fall back to"""
+    common = {'secretKey': secret, 'localIP': '127.0.0.1', 'localPort': local_port}
+    return [
+        dict({'name': name, 'type': 'xtcp'}, **common),
+        dict({'name': relay_name(name), 'type': 'stcp'}, **common),
+    ]
+
+
+def p2p_visitors(name: str, secret: str, bind_addr: str, bind_port: int,
+                 server_user: Optional[str] = None, fallback: bool = True) -> List[Dict[str, Any]]:
+    """xtcp visitor bound locally; with fallback, an stcp visitor takes over on failure"""
+    visitor = {
+        'name': f'{name}_visitor',
+        'type': 'xtcp',
+        'serverName': name,
+        'secretKey': secret,
+        'bindAddr': bind_addr,
+        'bindPort': bind_port,
+        # Keep the hole punched so later connections skip the handshake
+        'keepTunnelOpen': True,
+    }
+    visitors = [visitor]
+    if fallback:
+        relay = {
+            'name': f'{relay_name(name)}_visitor',
+            'type': 'stcp',
+            'serverName': relay_name(name),
+            'secretKey': secret,
+            # Only reachable through fallbackTo, no listener of its own
+            'bindPort': -1,
+        }
+        visitor['fallbackTo'] = relay['name']
+        visitor['fallbackTimeoutMs'] = FALLBACK_TIMEOUT_MS
+        visitors.append(relay)
+    if server_user:
+        for v in visitors:
+            v['serverUser'] = server_user
+    return visitors
+
+
+def merge_visitors(config: Dict[str, Any], visitors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add visitors to a client config, replacing ones with the same name"""
+    names = {v['name'] for v in visitors}
+    config['visitors'] = [v for v in config.get('visitors') or [] if v.get('name') not in names] + visitors
+    return config
+
+
+def _tail(path: Path, size: int = 256 * 1024) -> List[str]:
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        f.seek(max(0, f.tell() - size))
+        return f.read().decode(errors='replace').splitlines()
+
+
+def p2p_modes(config: Dict[str, Any], log_path: Path) -> Dict[str, str]:
+    """Last known path of each xtcp visitor from the frpc log
+
+    Returns {visitor: 'direct' | 'relay' | 'unknown'}. frpc logs a
+    successful hole punch per connection and a warning when it falls
+    back, so the most recent of those lines decides.
+    """
+    names = [v['name'] for v in config.get('visitors') or [] if v.get('type') == 'xtcp']
+    modes = {n: 'unknown' for n in names}
+    if not names or not log_path.exists():
+        return modes
+    for line in _tail(log_path):
+        for n in names:
+            if f'[{n}]' not in line:
+                continue
+            lower = line.lower()
+            if 'hole' in lower and 'success' in lower and 'prepare' not in lower:
+                modes[n] = 'direct'
+            elif 'fallback' in lower or 'error' in lower or 'failed' in lower:
+                modes[n] = 'relay'
+    return modes
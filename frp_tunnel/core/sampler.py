@@ -0,0 +1,133 @@
+"""Resource sampling of frps/frpc processes"""
+
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+import psutil
+
+# Warn when open FDs reach this share of RLIMIT_NOFILE
+FD_WARN_RATIO = 0.8
+
+
+def find_processes(name: str) -> List[psutil.Process]:
+    """Running processes whose executable is frps/frpc"""
+    names = {name, f'{name}.exe'}
+    procs = []
+    for p in psutil.process_iter(['name']):
+        if p.info['name'] in names:
+            procs.append(p)
+    return procs
+
+
+def _fd_count(proc: psutil.Process) -> Optional[int]:
+    try:
+        return proc.num_fds() if hasattr(proc, 'num_fds') else proc.num_handles()
+    except psutil.Error:
+        return None
+
+
+def _socket_counts(proc: psutil.Process) -> Dict[str, int]:
+    try:
+        conns = proc.net_connections('inet') if hasattr(proc, 'net_connections') else proc.connections('inet')
+    except psutil.Error:
+        return {}
+    counts = {'total': len(conns)}
+    for c in conns:
+        counts[c.status] = counts.get(c.status, 0) + 1
+    return counts
+
+
+def _nofile(proc: psutil.Process) -> Optional[int]:
+    try:
+        return proc.rlimit(psutil.RLIMIT_NOFILE)[0]
+    except (AttributeError, psutil.Error):
+        return None
+
+
+def sample(proc: psutil.Process, cpu_interval: float = 0.2) -> Dict[str, Any]:
+    """One resource sample of a process"""
+    with proc.oneshot():
+        rss = proc.memory_info().rss
+        threads = proc.num_threads()
+    return {
+        'ts': round(time.time(), 3),
+        'pid': proc.pid,
+        'cpu': proc.cpu_percent(interval=cpu_interval),
+        'rss': rss,
+        'fds': _fd_count(proc),
+        'nofile': _nofile(proc),
+        'threads': threads,
+        'sockets': _socket_counts(proc),
+    }
+
+
+def aggregate(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-process samples (e.g. cluster shards) into one record"""
+    total: Dict[str, Any] = {'ts': max(s['ts'] for s in samples), 'pids': [s['pid'] for s in samples]}
+    for key in ('cpu', 'rss', 'fds', 'threads'):
+        values = [s[key] for s in samples if s.get(key) is not None]
+        total[key] = round(sum(values), 1) if key == 'cpu' else (sum(values) if values else None)
+    sockets: Dict[str, int] = {}
+    for s in samples:
+        for status, n in s['sockets'].items():
+            sockets[status] = sockets.get(status, 0) + n
+    total['sockets'] = sockets
+    return total
+
+
+class RingBuffer:
+    """Bounded sample history in memory, mirrored to a JSON-lines file
+
+    The file is appended to and compacted back to `maxlen` lines once it
+    holds twice that many, so its size stays bounded without rewriting
+    it on every sample.
+    """
+
+    def __init__(self, path: Path, maxlen: int = 720):
+        self.path = path
+        self.maxlen = maxlen
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self._lines = 0
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    self._lines += 1
+                    try:
+                        self.samples.append(json.loads(line))
+                    except ValueError:
+                        continue
+
+    def append(self, item: Dict[str, Any]):
+        self.samples.append(item)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._lines + 1 >= 2 * self.maxlen:
+            tmp = self.path.with_suffix('.tmp')
+            tmp.write_text(''.join(json.dumps(s) + '\n' for s in self.samples))
+            tmp.replace(self.path)
+            self._lines = len(self.samples)
+        else:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(item) + '\n')
+            self._lines += 1
+
+
+def trend(samples: List[Dict[str, Any]], key: str) -> Optional[Dict[str, float]]:
+    """Change of a metric across the history: first, last, min, max, delta"""
+    values = [s[key] for s in samples if s.get(key) is not None]
+    if not values:
+        return None
+    return {'first': values[0], 'last': values[-1], 'min': min(values), 'max': max(values),
+            'delta': values[-1] - values[0]}
+
+
+def fd_warning(s: Dict[str, Any]) -> Optional[str]:
+    """Message when open FDs approach RLIMIT_NOFILE"""
+    if s.get('fds') is None or not s.get('nofile'):
+        return None
+    ratio = s['fds'] / s['nofile']
+    if ratio >= FD_WARN_RATIO:
+        return f"{s['fds']}/{s['nofile']} file descriptors in use ({ratio:.0%} of RLIMIT_NOFILE)"
+    return None
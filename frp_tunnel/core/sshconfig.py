@@ -0,0 +1,121 @@
+"""Generated ~/.ssh/config entries for tunnels"""
+
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .mux import DEFAULT_MUX_PORT, proxy_command
+
+BEGIN = '# >>> frp-tunnel managed >>>'
+END = '# <<< frp-tunnel managed <<<'
+
+# Link profiles: keep-alive cadence and compression per link type
+LINK_PROFILES = {
+    'lan': {'ServerAliveInterval': 60, 'ServerAliveCountMax': 3, 'Compression': 'no'},
+    'wan': {'ServerAliveInterval': 30, 'ServerAliveCountMax': 3, 'Compression': 'no'},
+    'slow': {'ServerAliveInterval': 15, 'ServerAliveCountMax': 4, 'Compression': 'yes'},
+}
+
+
+def is_ssh_proxy(proxy: Dict[str, Any]) -> bool:
+    """Heuristic: the proxy forwards an SSH server"""
+    return proxy.get('localPort') == 22 or str(proxy.get('name', '')).startswith('ssh')
+
+
+def _mux_entry(name: str, domain: str, server: str, mux_port: int) -> Dict[str, Any]:
+    """tcpmux proxies are reached by hostname through a ProxyCommand"""
+    return {'name': name, 'host': domain, 'port': None, 'mux_port': mux_port,
+            'proxy_command': proxy_command(server, mux_port)}
+
+
+def entries_from_client(config: Dict[str, Any], all_proxies: bool = False,
+                        mux_port: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Host entries from an frpc config's tcp and tcpmux proxies
+
+    tcpmux proxies use mux_port if given, else the muxPort recorded in
+    their metadatas by `client init --cluster`, else DEFAULT_MUX_PORT.
+    """
+    entries = []
+    server = config.get('serverAddr', '127.0.0.1')
+    for p in config.get('proxies') or []:
+        if p.get('type') == 'tcpmux' and p.get('customDomains'):
+            if all_proxies or is_ssh_proxy(p):
+                port = mux_port or int((p.get('metadatas') or {}).get('muxPort', DEFAULT_MUX_PORT))
+                entries.append(_mux_entry(p['name'], p['customDomains'][0], server, port))
+            continue
+        if p.get('type', 'tcp') != 'tcp' or not p.get('remotePort'):
+            continue
+        if all_proxies or is_ssh_proxy(p):
+            entries.append({'name': p['name'], 'host': server, 'port': p['remotePort']})
+    return entries
+
+
+def entries_from_server(proxies: List[Dict[str, Any]], host: str,
+                        mux_port: int = DEFAULT_MUX_PORT) -> List[Dict[str, Any]]:
+    """Host entries from frps dashboard /api/proxy/{tcp,tcpmux} results"""
+    entries = []
+    for p in proxies:
+        if p.get('status') == 'offline':
+            continue
+        conf = p.get('conf') or {}
+        if conf.get('customDomains'):
+            entries.append(_mux_entry(p['name'], conf['customDomains'][0], host, mux_port))
+            continue
+        port = conf.get('remotePort')
+        if port:
+            entries.append({'name': p['name'], 'host': host, 'port': port})
+    return entries
+
+
+def _alias(prefix: str, name: str) -> str:
+    return prefix + re.sub(r'[^A-Za-z0-9_.-]', '-', name)
+
+
+def render_block(entries: List[Dict[str, Any]], prefix: str = 'ft-', user: Optional[str] = None,
+                 link: str = 'wan', persist: str = '10m', multiplex: bool = True) -> str:
+    """Render the managed block
+
+    Each entry needs name, host and port; ProxyCommand may be set per entry.
+    With multiplex, repeat connections reuse one SSH session over the tunnel.
+    """
+    lines = [BEGIN, '# Generated by `ft ssh-config`; edits inside this block are overwritten']
+    opts = LINK_PROFILES[link]
+    for e in sorted(entries, key=lambda e: e['name']):
+        lines.append(f"Host {_alias(prefix, e['name'])}")
+        lines.append(f"    HostName {e['host']}")
+        if e.get('port'):
+            lines.append(f"    Port {e['port']}")
+        if e.get('user') or user:
+            lines.append(f"    User {e.get('user') or user}")
+        if e.get('proxy_command'):
+            lines.append(f"    ProxyCommand {e['proxy_command']}")
+        if multiplex:
+            lines.append('    ControlMaster auto')
+            # %C hashes host/port/user: short enough for the unix socket path limit
+            lines.append('    ControlPath ~/.ssh/ft-cm-%C')
+            lines.append(f'    ControlPersist {persist}')
+        for key, value in opts.items():
+            lines.append(f'    {key} {value}')
+        lines.append('    TCPKeepAlive yes')
+        lines.append('')
+    lines.append(END)
+    return '\n'.join(lines) + '\n'
+
+
+def update_config(path: Path, block: str) -> bool:
+    """Replace (or append) the managed block; returns True if the file changed"""
+    text = path.read_text() if path.exists() else ''
+    start, end = text.find(BEGIN), text.find(END)
+    if start != -1 and end != -1:
+        new = text[:start] + block + text[end + len(END):].lstrip('\n')
+    else:
+        new = text + ('\n' if text and not text.endswith('\n') else '') + ('\n' if text else '') + block
+    if new == text:
+        return False
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.ft-tmp')
+    tmp.write_text(new)
+    os.chmod(tmp, 0o600)
+    os.replace(tmp, path)
+    return True
@@ -0,0 +1,279 @@
+"""Service tuning and kernel checks for high-connection servers"""
+
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import psutil
+
+SYSCTL_CONF = '/etc/sysctl.d/99-frp-tunnel.conf'
+
+# Every relayed connection costs frps two sockets (user side + work conn)
+NOFILE_LIMIT = 1048576
+
+
+def host_resources() -> Dict[str, int]:
+    """Return CPU count and total memory (bytes) of this host"""
+    return {
+        'cpus': psutil.cpu_count() or 1,
+        'memory': psutil.virtual_memory().total,
+    }
+
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """Parse a CPU list like '0-3,6' into [0, 1, 2, 3, 6]
+
+    Raises ValueError for malformed parts, reversed ranges or an empty list.
+    """
+    cpus = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        if not start.isdigit() or (end and not end.isdigit()):
+            raise ValueError(f'invalid CPU list entry {part!r} (expected e.g. 0-3,6)')
+        if end and int(end) < int(start):
+            raise ValueError(f'reversed CPU range {part!r}')
+        cpus.extend(range(int(start), int(end or start) + 1))
+    if not cpus:
+        raise ValueError(f'empty CPU list {spec!r}')
+    return sorted(set(cpus))
+
+
+def service_tuning(cpus: Optional[str] = None) -> Dict[str, object]:
+    """Compute service limits and Go runtime settings sized to this host
+
+    Args:
+        cpus: Optional CPU affinity list ('0-3,6'); GOMAXPROCS follows it
+    """
+    res = host_resources()
+    affinity = parse_cpu_list(cpus) if cpus else []
+    procs = len(affinity) or res['cpus']
+    mem_mib = res['memory'] // (1024 * 1024)
+    # Leave headroom for the kernel's socket buffers and other services
+    mem_limit = max(64, mem_mib * 70 // 100)
+    # Fewer GC cycles when memory is plentiful, default pacing on small hosts
+    gogc = 200 if mem_mib >= 2048 else 100
+    return {
+        'nofile': NOFILE_LIMIT,
+        'tasks_max': 'infinity',
+        'affinity': affinity,
+        'env': {
+            'GOMAXPROCS': str(procs),
+            'GOGC': str(gogc),
+            'GOMEMLIMIT': f'{mem_limit}MiB',
+        },
+    }
+
+
+def systemd_unit(binary: Path, config: Path, user: str, tuning: Optional[Dict] = None) -> str:
+    """Render the frp-server systemd unit, optionally with tuning"""
+    lines = [
+        '[Unit]',
+        'Description=FRP Tunnel Server',
+        'After=network.target',
+        '',
+        '[Service]',
+        'Type=simple',
+        f'User={user}',
+        f'ExecStart={binary} -c {config}',
+        'Restart=always',
+        'RestartSec=10',
+    ]
+    if tuning:
+        lines.append(f"LimitNOFILE={tuning['nofile']}")
+        lines.append(f"TasksMax={tuning['tasks_max']}")
+        lines.append('CPUAccounting=yes')
+        lines.append('MemoryAccounting=yes')
+        for key, value in tuning['env'].items():
+            lines.append(f'Environment={key}={value}')
+        if tuning['affinity']:
+            lines.append('CPUAffinity=' + ' '.join(map(str, tuning['affinity'])))
+    lines += ['', '[Install]', 'WantedBy=multi-user.target', '']
+    return '\n'.join(lines)
+
+
+def launchd_tuning(tuning: Dict) -> str:
+    """Render launchd plist keys for limits and Go runtime environment"""
+    env = ''.join(f'<key>{k}</key><string>{v}</string>' for k, v in tuning['env'].items())
+    return (
+        f"  <key>EnvironmentVariables</key><dict>{env}</dict>\n"
+        f"  <key>SoftResourceLimits</key><dict><key>NumberOfFiles</key><integer>{tuning['nofile']}</integer></dict>\n"
+        f"  <key>HardResourceLimits</key><dict><key>NumberOfFiles</key><integer>{tuning['nofile']}</integer></dict>\n"
+    )
+
+
+# ─── Kernel checks ───
+
+def _read_sysctl(key: str) -> Optional[str]:
+    path = Path('/proc/sys') / key.replace('.', '/')
+    try:
+        return ' '.join(path.read_text().split())
+    except OSError:
+        return None
+
+
+def _at_least(minimum: int, field: int = -1):
+    def check(value: str) -> bool:
+        return int(value.split()[field]) >= minimum
+    return check
+
+
+# Linux default ephemeral range: clear of tunnel ports such as the fleet
+# default 10000-30000 and the usual 6000-9999 remotePorts
+EPHEMERAL_RANGE = (32768, 60999)
+
+
+def _port_range(value: str) -> bool:
+    low, high = map(int, value.split())
+    return low >= EPHEMERAL_RANGE[0] and high - low >= 20000
+
+
+def parse_port_list(value: str) -> Set[int]:
+    """'6022,10000-10002' -> {6022, 10000, 10001, 10002}"""
+    ports = set()
+    for part in value.replace(' ', ',').split(','):
+        if '-' in part:
+            start, end = part.split('-', 1)
+            ports.update(range(int(start), int(end) + 1))
+        elif part:
+            ports.add(int(part))
+    return ports
+
+
+def port_list(ports) -> str:
+    """Inverse of parse_port_list, with consecutive ports merged"""
+    parts, run = [], []
+    for port in sorted(ports):
+        if run and port == run[-1] + 1:
+            run.append(port)
+            continue
+        if run:
+            parts.append(str(run[0]) if len(run) == 1 else f'{run[0]}-{run[-1]}')
+        run = [port]
+    if run:
+        parts.append(str(run[0]) if len(run) == 1 else f'{run[0]}-{run[-1]}')
+    return ','.join(parts)
+
+
+def allow_ports_set(allow_ports: List[Dict[str, int]]) -> Set[int]:
+    """Ports covered by frps allowPorts entries ({start, end} or {single})"""
+    ports = set()
+    for entry in allow_ports or []:
+        if 'single' in entry:
+            ports.add(int(entry['single']))
+        else:
+            ports.update(range(int(entry['start']), int(entry['end']) + 1))
+    return ports
+
+
+# (key, recommended value, check, why)
+SYSCTL_CHECKS = [
+    ('net.core.somaxconn', '65535', _at_least(4096),
+     'accept queue for bursts of new tunnel connections'),
+    ('net.ipv4.tcp_max_syn_backlog', '65535', _at_least(4096),
+     'half-open connection queue'),
+    ('net.core.default_qdisc', 'fq', lambda v: v == 'fq',
+     'pacing qdisc recommended for BBR'),
+    ('net.ipv4.tcp_congestion_control', 'bbr', lambda v: v == 'bbr',
+     'better throughput on lossy long-haul links'),
+    ('net.ipv4.ip_local_port_range', f'{EPHEMERAL_RANGE[0]} {EPHEMERAL_RANGE[1]}', _port_range,
+     'keep outgoing connections off the ports frps listens on for proxies'),
+    ('net.ipv4.tcp_tw_reuse', '1', lambda v: v == '1',
+     'reuse TIME_WAIT sockets for outgoing connections'),
+    ('net.core.rmem_max', '16777216', _at_least(16777216),
+     'max socket receive buffer'),
+    ('net.core.wmem_max', '16777216', _at_least(16777216),
+     'max socket send buffer'),
+    ('net.ipv4.tcp_rmem', '4096 87380 16777216', _at_least(16777216),
+     'TCP receive buffer autotuning ceiling'),
+    ('net.ipv4.tcp_wmem', '4096 65536 16777216', _at_least(16777216),
+     'TCP send buffer autotuning ceiling'),
+]
+
+
+def _reserved_check(allow_ports: List[Dict[str, int]]):
+    """ip_local_reserved_ports entry covering allowPorts inside the ephemeral range
+
+    Returns None when no allowed port can collide with an ephemeral port.
+    """
+    value = _read_sysctl('net.ipv4.ip_local_port_range')
+    low, high = map(int, value.split()) if value else EPHEMERAL_RANGE
+    wanted = {p for p in allow_ports_set(allow_ports) if low <= p <= high}
+    if not wanted:
+        return None
+    current = _read_sysctl('net.ipv4.ip_local_reserved_ports') or ''
+    recommended = port_list(wanted | parse_port_list(current))
+    return ('net.ipv4.ip_local_reserved_ports', recommended,
+            lambda v: wanted <= parse_port_list(v),
+            'allowPorts inside the ephemeral range, so proxies can always bind them')
+
+
+def check_sysctls(allow_ports: Optional[List[Dict[str, int]]] = None) -> List[Dict[str, object]]:
+    """Check kernel settings relevant to relays
+
+    Returns a list of dicts with key, value, recommended, ok and why.
+    Settings the kernel does not expose have value None and ok False.
+    With the frps allowPorts entries, also checks that the ones inside
+    the ephemeral range are reserved.
+    """
+    checks = list(SYSCTL_CHECKS)
+    reserved = _reserved_check(allow_ports) if allow_ports else None
+    if reserved:
+        checks.append(reserved)
+    results = []
+    for key, recommended, check, why in checks:
+        value = _read_sysctl(key)
+        try:
+            ok = value is not None and check(value)
+        except (ValueError, IndexError):
+            ok = False
+        results.append({'key': key, 'value': value, 'recommended': recommended, 'ok': ok, 'why': why})
+    return results
+
+
+def bbr_available() -> bool:
+    """Check if the BBR congestion control module is available"""
+    available = _read_sysctl('net.ipv4.tcp_available_congestion_control') or ''
+    return 'bbr' in available.split()
+
+
+def apply_sysctls(results: List[Dict[str, object]]) -> Tuple[List[str], Dict[str, str]]:
+    """Apply recommended values for failed checks and persist them
+
+    Returns (applied keys, {key: error} for keys sysctl rejected). Keys
+    that applied are persisted even if others failed. Raises
+    subprocess.CalledProcessError if writing the sysctl.d file fails.
+    """
+    fixes = [r for r in results if not r['ok'] and r['value'] is not None]
+    if any(r['key'] == 'net.ipv4.tcp_congestion_control' for r in fixes) and not bbr_available():
+        subprocess.run(['sudo', 'modprobe', 'tcp_bbr'], capture_output=True)
+    applied, failed = [], {}
+    for r in fixes:
+        result = subprocess.run(['sudo', 'sysctl', '-w', f"{r['key']}={r['recommended']}"],
+                                capture_output=True, text=True)
+        if result.returncode == 0:
+            applied.append(r['key'])
+        else:
+            failed[r['key']] = result.stderr.strip() or f'exit {result.returncode}'
+    if applied:
+        # Persist the whole managed set so later runs don't drop earlier fixes
+        conf = '# Managed by frp-tunnel (ft server doctor --fix)\n'
+        for r in results:
+            if r['value'] is not None:
+                value = r['recommended'] if r['key'] in applied else r['value']
+                conf += f"{r['key']} = {value}\n"
+        subprocess.run(['sudo', 'tee', SYSCTL_CONF], input=conf, text=True, capture_output=True, check=True)
+    return applied, failed
+
+
+def nofile_limit(pid: Optional[int] = None) -> Optional[int]:
+    """Soft RLIMIT_NOFILE of a process (or this one), None if unknown"""
+    try:
+        if pid is None:
+            import resource
+            return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        return psutil.Process(pid).rlimit(psutil.RLIMIT_NOFILE)[0]
+    except (ImportError, AttributeError, psutil.Error, OSError):
+        return None
@@ -188,15 +188,26 @@ class TunnelManager:
             log_path = self.config_manager.get_log_path(component)
             if log_path.exists():
                 try:
-                    with open(log_path, 'r') as f:
-                        log_lines = f.readlines()
-                        recent_lines = log_lines[-lines:]
-                        logs.extend([f"[{component}] {line.strip()}" for line in recent_lines])
+                    recent_lines = self._tail_lines(log_path, lines)
+                    logs.extend([f"[{component}] {line.strip()}" for line in recent_lines])
                 except Exception:
                     pass
         
         return logs
     
+    def _tail_lines(self, path: Path, lines: int, block: int = 65536) -> List[str]:
+        """Read the last lines of a file without scanning all of it"""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            data = b''
+            while pos > 0 and data.count(b'\n') <= lines:
+                step = min(block, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        return data.decode(errors='replace').splitlines()[-lines:]
+    
     def clean_cache(self):
         """Clean cache and temporary files"""
         import shutil
@@ -0,0 +1,85 @@
+"""HTTP vhost helpers: many web services behind one frps HTTP port"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_VHOST_HTTP_PORT = 8080
+
+
+def http_proxy(name: str, local_port: int, local_ip: str = '127.0.0.1',
+               domains: Sequence[str] = (), subdomain: Optional[str] = None,
+               compress: bool = False, host_rewrite: Optional[str] = None,
+               locations: Sequence[str] = ()) -> Dict[str, Any]:
+    """frpc http proxy routed by Host header (custom domains and/or subdomain)"""
+    proxy = {'name': name, 'type': 'http', 'localIP': local_ip, 'localPort': local_port}
+    if domains:
+        proxy['customDomains'] = list(domains)
+    if subdomain:
+        proxy['subdomain'] = subdomain
+    if locations:
+        proxy['locations'] = list(locations)
+    if host_rewrite:
+        proxy['hostHeaderRewrite'] = host_rewrite
+    if compress:
+        proxy['transport'] = {'useCompression': True}
+    return proxy
+
+
+# Fields http_proxy() owns; an update drops the ones it no longer sets
+ROUTE_KEYS = ('type', 'localIP', 'localPort', 'customDomains', 'subdomain', 'locations', 'hostHeaderRewrite')
+
+
+def upsert_proxy(config: Dict[str, Any], proxy: Dict[str, Any]) -> bool:
+    """Add proxy to config, or merge it into the one with the same name; True if updated
+
+    Routing fields are replaced, anything else on the existing proxy
+    (healthCheck, transport.bandwidthLimit, metadatas, ...) is kept.
+    Raises ValueError if the existing proxy is of another type: its
+    type-specific keys (remotePort, secretKey, ...) would survive.
+    """
+    proxies = config.setdefault('proxies', [])
+    for existing in proxies:
+        if existing.get('name') != proxy['name']:
+            continue
+        if existing.get('type') != proxy['type']:
+            raise ValueError(f"{proxy['name']} is a {existing.get('type', '?')} proxy, not {proxy['type']}")
+        for key in ROUTE_KEYS:
+            existing.pop(key, None)
+        transport = existing.pop('transport', None) or {}
+        transport.pop('useCompression', None)
+        transport.update(proxy.get('transport') or {})
+        existing.update({k: v for k, v in proxy.items() if k != 'transport'})
+        if transport:
+            existing['transport'] = transport
+        return True
+    proxies.append(proxy)
+    return False
+
+
+def route_hosts(conf: Dict[str, Any], subdomain_host: Optional[str] = None) -> List[str]:
+    """Host names an http proxy answers on"""
+    hosts = list(conf.get('customDomains') or [])
+    if conf.get('subdomain'):
+        sub = conf['subdomain']
+        hosts.append(f'{sub}.{subdomain_host}' if subdomain_host else f'{sub}.*')
+    return hosts
+
+
+def route_urls(conf: Dict[str, Any], port: Optional[int] = None,
+               subdomain_host: Optional[str] = None) -> List[str]:
+    """URLs an http proxy answers on through a vhost port"""
+    suffix = '' if port in (None, 80) else f':{port}'
+    return [f'http://{host}{suffix}{location}'
+            for host in route_hosts(conf, subdomain_host) for location in conf.get('locations') or ['/']]
+
+
+def http_routes(proxies: List[Dict[str, Any]], server_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Online http proxies from the dashboard as sorted route rows"""
+    routes = []
+    for p in proxies:
+        if p.get('status') == 'offline':
+            continue
+        conf = p.get('conf') or {}
+        for url in route_urls(conf, server_config.get('vhostHTTPPort'), server_config.get('subdomainHost')):
+            routes.append({'url': url, 'name': p.get('name', '?'), 'conns': p.get('curConns', 0),
+                           'compressed': bool((conf.get('transport') or {}).get('useCompression'))})
+    return sorted(routes, key=lambda r: r['url'])
@@ -0,0 +1,176 @@
+"""Proxy state-change detection from the frpc admin API"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+
+def flatten_status(payload: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Turn frpc /api/status ({type: [proxy, ...]}) into {name: state}"""
+    states = {}
+    for ptype, proxies in (payload or {}).items():
+        for p in proxies or []:
+            states[p.get('name', '?')] = {
+                'type': p.get('type', ptype),
+                'status': p.get('status', 'unknown'),
+                'err': p.get('err', ''),
+                'remote_addr': p.get('remote_addr', ''),
+            }
+    return states
+
+
+class StateTracker:
+    """Per-proxy state machine with debounce
+
+    A new state is only reported after it has held for `debounce`
+    seconds, so a proxy that flaps error -> running within the window
+    produces no events.
+    """
+
+    def __init__(self, debounce: float = 0):
+        self.debounce = debounce
+        self.stable: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, tuple] = {}
+
+    def update(self, states: Dict[str, Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Feed one poll result, return the confirmed transitions"""
+        now = time.time() if now is None else now
+        current = dict(states)
+        for name in self.stable:
+            if name not in current:
+                current[name] = {'status': 'removed', 'err': '', 'type': self.stable[name].get('type')}
+        events = []
+        for name, state in current.items():
+            old = self.stable.get(name)
+            if old is not None and old['status'] == state['status']:
+                self._pending.pop(name, None)
+                continue
+            pending = self._pending.get(name)
+            if pending is None or pending[0]['status'] != state['status']:
+                self._pending[name] = (state, now)
+                pending = self._pending[name]
+            if now - pending[1] < self.debounce:
+                continue
+            del self._pending[name]
+            events.append({
+                'ts': round(now, 3),
+                'proxy': name,
+                'type': state.get('type'),
+                'from': old['status'] if old else None,
+                'to': state['status'],
+                'err': state.get('err', ''),
+            })
+            if state['status'] == 'removed':
+                self.stable.pop(name, None)
+            else:
+                self.stable[name] = state
+        return events
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+
+class AdaptiveInterval:
+    """Poll interval: fast while states settle, base when stable, backoff on errors"""
+
+    def __init__(self, base: float = 1.0, fast: float = 0.25, max_interval: float = 10.0):
+        self.base = base
+        self.fast = fast
+        self.max_interval = max_interval
+        self.current = base
+
+    def on_success(self, unsettled: bool) -> float:
+        self.current = self.fast if unsettled else self.base
+        return self.current
+
+    def on_error(self) -> float:
+        self.current = min(max(self.current, self.base) * 2, self.max_interval)
+        return self.current
+
+
+class WebhookSink:
+    """Batch events and POST them as {"events": [...]}"""
+
+    def __init__(self, url: str, batch_size: int = 50, batch_interval: float = 2.0, timeout: float = 5):
+        self.url = url
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._buffer: List[Dict[str, Any]] = []
+        self._first = 0.0
+
+    def add(self, events: List[Dict[str, Any]]):
+        if events and not self._buffer:
+            self._first = time.monotonic()
+        self._buffer.extend(events)
+
+    def due(self) -> bool:
+        return bool(self._buffer) and (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._first >= self.batch_interval)
+
+    def flush(self) -> bool:
+        """POST buffered events; keeps them for retry if the POST fails"""
+        if not self._buffer:
+            return True
+        try:
+            resp = self.session.post(self.url, json={'events': self._buffer}, timeout=self.timeout)
+            resp.raise_for_status()
+        except requests.RequestException:
+            return False
+        self._buffer = []
+        return True
+
+
+def _api_event(old: Optional[str], new: str, err: str = '') -> Dict[str, Any]:
+    return {'ts': round(time.time(), 3), 'proxy': None, 'type': 'frpc', 'from': old, 'to': new, 'err': err}
+
+
+def watch(base: str, emit: Callable[[List[Dict[str, Any]]], None], auth=None,
+          interval: float = 1.0, debounce: float = 0, once: bool = False,
+          on_error: Optional[Callable[[str], None]] = None):
+    """Poll the frpc admin API and call emit() with each batch of transitions
+
+    Uses one keep-alive session; polls faster while a transition is
+    pending debounce and backs off while the API is unreachable. Losing
+    and regaining the API (e.g. frpc died) is emitted as an event with
+    proxy None and type 'frpc'; emit() keeps being called with no events
+    while it is down so buffering sinks can still flush. If the first poll
+    already fails, the event is from None: the API was never reachable.
+    """
+    session = requests.Session()
+    tracker = StateTracker(debounce)
+    pacer = AdaptiveInterval(base=interval)
+    reachable: Optional[bool] = None
+    while True:
+        try:
+            resp = session.get(base + '/api/status', auth=auth, timeout=max(interval, 1))
+            resp.raise_for_status()
+            states = flatten_status(resp.json())
+        except (requests.RequestException, ValueError) as e:
+            if reachable is not False:
+                emit([_api_event('reachable' if reachable else None, 'unreachable', str(e))])
+                if on_error:
+                    on_error(str(e))
+            else:
+                emit([])
+            reachable = False
+            if once:
+                return
+            time.sleep(pacer.on_error())
+            continue
+        events = tracker.update(states)
+        if reachable is False:
+            events.insert(0, _api_event('unreachable', 'reachable'))
+        reachable = True
+        emit(events)
+        if once and not tracker.has_pending():
+            return
+        time.sleep(pacer.on_success(tracker.has_pending()))
+
+
+def json_lines(events: List[Dict[str, Any]]) -> str:
+    return ''.join(json.dumps(e, separators=(',', ':')) + '\n' for e in events)
@@ -0,0 +1,81 @@
+"""Console entry point with a fast path for `ft status --fast`
+
+Only the standard library is imported here: when an `ft daemon` is
+listening, `ft status --fast` is answered from its socket without loading
+click, rich, yaml or requests. Everything else goes to the full CLI.
+"""
+
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+
+def socket_path() -> Path:
+    """Daemon socket: FT_SOCKET or ~/data/frp/ft.sock (same dir as cli.DATA_DIR)"""
+    return Path(os.getenv('FT_SOCKET') or Path.home() / 'data' / 'frp' / 'ft.sock')
+
+
+def query(cmd: str = 'status', timeout: float = 2.0):
+    """Send one request to the daemon; None if it is not running or answers garbage"""
+    path = socket_path()
+    if not hasattr(socket, 'AF_UNIX') or not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps({'cmd': cmd}).encode() + b'\n')
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        reply = json.loads(data.decode())
+    except (OSError, ValueError):
+        # Stale socket, daemon exiting mid-reply or a truncated line: slow path
+        return None
+    return reply if isinstance(reply, dict) else None
+
+
+def render(state) -> str:
+    """Plain-text status from a daemon snapshot"""
+    lines = []
+    server, client = state['server'], state['client']
+    if server['config'] or server['running']:
+        text = f"running (pid {', '.join(map(str, server['pids']))})" if server['running'] else 'stopped'
+        if server['bindPort']:
+            text += f" · port {server['bindPort']}"
+        if server['proxies'] is not None:
+            online = [p for p in server['proxies'] if p.get('status') != 'offline']
+            text += f" · {len(online)} proxies · {sum(p.get('conns') or 0 for p in online)} conns"
+        lines.append(f'Server: {text}')
+    if client['config'] or client['running']:
+        text = f"running (pid {', '.join(map(str, client['pids']))})" if client['running'] else 'stopped'
+        if client['server']:
+            text += f" · {client['server']}"
+        if client['proxies'] is not None:
+            up = sum(1 for p in client['proxies'] if p.get('status') == 'running')
+            text += f" · {up}/{len(client['proxies'])} proxies running"
+        elif client['ports']:
+            text += f" · {len(client['ports'])} proxies"
+        lines.append(f'Client: {text}')
+        for p in client['proxies'] or []:
+            if p.get('status') != 'running':
+                lines.append(f"  {p['name']}: {p.get('status')} {p.get('err') or ''}".rstrip())
+    if state.get('public_ip'):
+        lines.append(f"Public IP: {state['public_ip']}")
+    return '\n'.join(lines or ['No server or client configured'])
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ['status'] and '--fast' in args and set(args[1:]) <= {'--fast', '--json'}:
+        state = query()
+        if state is not None and 'error' not in state:
+            sys.stdout.write((json.dumps(state) if '--json' in args else render(state)) + '\n')
+            return
+    from .cli import main as cli_main
+    cli_main()
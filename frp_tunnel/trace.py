@@ -0,0 +1,166 @@
+"""Phase timing and profiling hooks for CLI commands
+
+Enable with FT_TRACE=1 (JSON lines on stderr), FT_TRACE=/path/file.jsonl,
+FT_TRACE=/path/trace.json (Chrome trace, open in chrome://tracing or
+Perfetto) or the equivalent `ft --trace[-file]` options; FT_TRACE=0, false,
+no or off leave tracing disabled. FT_PROFILE=cprofile or
+FT_PROFILE=pyinstrument wraps the whole command in a profiler.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Recorded at import so the cost of importing the CLI shows up as a phase
+_T0 = time.perf_counter()
+_WALL0 = time.time()
+
+_enabled = False
+_target = None
+_spans = []
+_local = threading.local()
+
+
+# FT_TRACE values that mean off / stderr rather than a file path
+_OFF = ('', '0', 'false', 'no', 'off')
+_STDERR = ('1', 'true', 'yes', 'on')
+
+
+def enable(target=None):
+    """Start recording; target is None/'1'/'true' (stderr) or a file path"""
+    global _enabled, _target
+    _enabled = True
+    _target = None if target is None or target.lower() in _STDERR else target
+
+
+def _env_target():
+    """FT_TRACE as an enable() target, or False when tracing is off"""
+    value = os.getenv('FT_TRACE', '').strip()
+    return False if value.lower() in _OFF else value
+
+
+def enabled():
+    return _enabled
+
+
+def _record(name, start, end, args, depth):
+    _spans.append({'name': name, 'start': start - _T0, 'dur': end - start,
+                   'depth': depth, 'tid': threading.get_ident(), 'args': args})
+
+
+@contextmanager
+def span(name, **args):
+    """Time a phase; nested spans are recorded with their depth"""
+    if not _enabled:
+        yield
+        return
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        _record(name, start, time.perf_counter(), args, depth)
+
+
+def timed(name):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def command_name():
+    """'server-start' style name of the running command"""
+    words, args = [], iter(sys.argv[1:])
+    for arg in args:
+        if arg in ('--trace-file', '--profile'):
+            next(args, None)
+        elif not arg.startswith('-'):
+            words.append(arg)
+        if len(words) == 2:
+            break
+    return '-'.join(words) or 'ft'
+
+
+def mark_imported():
+    """Record the import phase (process start of the CLI until now)"""
+    if _enabled:
+        _record('import', _T0, time.perf_counter(), {}, 0)
+
+
+def _chrome_trace():
+    pid = os.getpid()
+    events = [{'name': s['name'], 'ph': 'X', 'ts': (s['start']) * 1e6, 'dur': s['dur'] * 1e6,
+               'pid': pid, 'tid': s['tid'], 'args': s['args']} for s in _spans]
+    return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'argv': sys.argv, 'start': _WALL0}})
+
+
+def _json_lines():
+    return ''.join(json.dumps({'phase': s['name'], 'start_ms': round(s['start'] * 1000, 3),
+                               'ms': round(s['dur'] * 1000, 3), 'depth': s['depth'], **s['args']},
+                              default=str) + '\n' for s in sorted(_spans, key=lambda s: s['start']))
+
+
+def flush():
+    """Write recorded spans to the configured target"""
+    if not _enabled or not _spans:
+        return
+    if _target is None:
+        sys.stderr.write(_json_lines())
+        return
+    text = _chrome_trace() if _target.endswith('.json') else _json_lines()
+    with open(_target, 'a' if not _target.endswith('.json') else 'w') as f:
+        f.write(text)
+
+
+@contextmanager
+def profiled(profiler, out_dir):
+    """Profile the enclosed block with cProfile or pyinstrument, saving the report in out_dir"""
+    name = command_name()
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            sys.stderr.write('pyinstrument profiling needs: pip install pyinstrument\n')
+            yield
+            return
+        prof = Profiler()
+        prof.start()
+        try:
+            yield
+        finally:
+            prof.stop()
+            path = out_dir / f'profile-{name}.html'
+            path.write_text(prof.output_html())
+            sys.stderr.write(prof.output_text(unicode=True, color=False))
+            sys.stderr.write(f'Profile saved: {path}\n')
+        return
+    import cProfile
+    import pstats
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        path = out_dir / f'profile-{name}.prof'
+        prof.dump_stats(str(path))
+        pstats.Stats(prof, stream=sys.stderr).sort_stats('cumulative').print_stats(15)
+        sys.stderr.write(f'Profile saved: {path} (view with snakeviz or pstats)\n')
+
+
+if _env_target() is not False:
+    enable(_env_target())